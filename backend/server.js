@@ -55,7 +55,7 @@ app.use((req, res, next) => {
 const server = http.createServer(app);
 const io = new Server(server, {cors: {origin: "*"}});
 
-app.post('/api/log-alert', (req, res, next) => {
+app.post(['/api/log-alert', '/api/log-alert/batch'], (req, res, next) => {
   /*f (req.headers['x-api-key'] !== API_KEY) {
     console.log("❌ Rejected key:", req.headers["x-api-key"]);
     return res.status(403).json({ error: "Unauthorized source" });
@@ -63,38 +63,72 @@ app.post('/api/log-alert', (req, res, next) => {
   next();
 });
 
+// Emits one alert to the dashboard and, for "High" severity, records it
+// on-chain. Returns false if the payload is missing required fields.
+async function handleAlert(alert) {
+  const { alertId, sourceType, severity, logData } = alert || {};
+
+  if(!alertId || !sourceType || !severity || !logData){
+    return false;
+  }
+  const isSuspicious = severity !== "Safe";
+
+  io.emit('new-live-log', {
+    alertId,
+    sourceType,
+    logData,
+    severity,
+    isSuspicious,
+    timestamp: Math.floor(Date.now()/1000)
+  });
+
+  if(severity !== "High"){
+    return true;
+  }
+
+  const hash = crypto.createHash('sha256').update(logData).digest('hex');
+
+  await contract.methods.addAlert(
+    alertId,
+    sourceType,
+    '0x'+hash,
+    true,
+    100,
+    "Snort-Rule-Engine"
+  ).send({from: account, gas: 500000});
+  return true;
+}
+
+// alertIds seen recently (finished or still in progress) -> result promise.
+// A collector that timed out and resends a batch gets the earlier outcome
+// for the alerts that already went through instead of a second dashboard
+// emit and a second (reverting) transaction. Failed alerts are forgotten
+// so a retry handles them again.
+const RECENT_ALERT_LIMIT = 10000;
+const recentAlerts = new Map();
+
+function handleAlertOnce(alert){
+  const alertId = alert && alert.alertId;
+  if(!alertId){
+    return handleAlert(alert);
+  }
+  if(recentAlerts.has(alertId)){
+    return recentAlerts.get(alertId);
+  }
+  const pending = handleAlert(alert);
+  recentAlerts.set(alertId, pending);
+  pending.catch(() => recentAlerts.delete(alertId));
+  if(recentAlerts.size > RECENT_ALERT_LIMIT){
+    recentAlerts.delete(recentAlerts.keys().next().value);
+  }
+  return pending;
+}
+
 app.post('/api/log-alert', async (req, res) => {
   try{
-    const { alertId, sourceType, severity, logData, confidence } = req.body;
-
-    if(!alertId || !sourceType || !severity || !logData){
+    if(!await handleAlertOnce(req.body)){
       return res.status(400).json({error: "Invalid payload"});
     }
-    const isSuspicious = severity !== "Safe";
-
-    io.emit('new-live-log', {
-      alertId,
-      sourceType,
-      logData,
-      severity,
-      isSuspicious,
-      timestamp: Math.floor(Date.now()/1000)
-    });
-    
-    if(severity !== "High"){
-      return res.json({success: true});
-    }
-
-    const hash = crypto.createHash('sha256').update(logData).digest('hex');
-
-    await contract.methods.addAlert(
-      alertId,
-      sourceType,
-      '0x'+hash,
-      true,
-      100,
-      "Snort-Rule-Engine"
-    ).send({from: account, gas: 500000});
     res.json({success: true});
   }
   catch(err){
@@ -103,6 +137,34 @@ app.post('/api/log-alert', async (req, res) => {
   }
 });
 
+// Batched variant used by the Python collectors: { alerts: [ ... ] }.
+// Alerts are handled in order (one transaction at a time) and the
+// response carries a per-alert status in the same order. If any alert
+// failed the status is 207 and its entry is marked retryable, so the
+// shipper resends just those alerts.
+app.post('/api/log-alert/batch', async (req, res) => {
+  const { alerts } = req.body || {};
+
+  if(!Array.isArray(alerts) || alerts.length === 0){
+    return res.status(400).json({error: "Invalid payload"});
+  }
+
+  const results = [];
+  let failed = 0;
+  for(const alert of alerts){
+    try{
+      const ok = await handleAlertOnce(alert);
+      results.push(ok ? {success: true} : {error: "Invalid payload"});
+    }
+    catch(err){
+      console.error(err);
+      failed++;
+      results.push({error: "Backend error", retryable: true});
+    }
+  }
+  res.status(failed ? 207 : 200).json({success: failed === 0, results});
+});
+
 app.get('/api/alerts', async (req, res) => {
     try {
         const count = await contract.methods.getAlertsCount().call();
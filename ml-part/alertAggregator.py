@@ -0,0 +1,160 @@
+import threading
+import time
+from collections import OrderedDict
+
+# ------------------------------------------------------------
+# Alert Deduplication / Aggregation
+# ------------------------------------------------------------
+# A port scan turns into thousands of alerts that differ only in their
+# id and (often) ports. The aggregator collapses alerts sharing the same
+# key (rule msg, src host, dst host, proto) into at most two alerts per
+# window:
+#
+#  - the first alert of a key is emitted right away (count 1) and opens
+#    a window of window_seconds, so an incident is never reported late
+#    and a crash can only lose duplicates, not the incident itself
+#  - later alerts with that key only bump its count and lastSeen
+#  - when the window closes, and only if duplicates arrived, one summary
+#    alert is emitted carrying the window's count, firstSeen and lastSeen
+#    (and the most severe classification seen) under the alertId of the
+#    last duplicate, with firstAlertId pointing at the alert already sent
+#
+# At most max_keys windows are open; when a new key arrives while full,
+# the oldest window is closed early, so memory stays bounded.
+
+SEVERITY_RANK = {'Safe': 0, 'Low': 1, 'Medium': 2, 'High': 3}
+
+
+def host_of(endpoint):
+    """'10.0.0.5:80' -> '10.0.0.5' (scans vary the port, not the host)."""
+    host, sep, port = endpoint.rpartition(':')
+    return host if sep and port.isdigit() else endpoint
+
+
+class AlertAggregator:
+    def __init__(self, emit, window_seconds=10.0, max_keys=10000, ignore_ports=True, autoflush=True):
+        """
+        emit: callable receiving each aggregated alert (e.g. shipper.submit).
+        ignore_ports: key on hosts only, so one scan across many ports
+             collapses into one alert.
+        autoflush: close expired windows from a background thread, so an
+             incident is reported even if no further alerts arrive.
+        """
+        self.emit = emit
+        self.window = window_seconds
+        self.max_keys = max(1, int(max_keys))
+        self.ignore_ports = ignore_ports
+
+        self._windows = OrderedDict()  # key -> aggregate, oldest window first
+        self._lock = threading.Lock()
+        self.received = 0
+        self.emitted = 0
+
+        self._stopping = threading.Event()
+        self._flusher = None
+        if autoflush:
+            self._flusher = threading.Thread(target=self._run, name='alert-aggregator', daemon=True)
+            self._flusher.start()
+
+    def key_for(self, alert):
+        src = alert.get('src', '')
+        dst = alert.get('dst', '')
+        if self.ignore_ports:
+            src, dst = host_of(src), host_of(dst)
+        return (alert.get('msg') or alert.get('logData', ''), src, dst, alert.get('proto', ''))
+
+    def add(self, alert, now=None):
+        """
+        Account for one raw alert. Its optional 'msg', 'src', 'dst' and
+        'proto' fields form the key (falling back to logData); all other
+        fields of the first alert in a window are kept as-is.
+        """
+        now = time.time() if now is None else now
+        key = self.key_for(alert)
+        expired = []
+        first = None
+        with self._lock:
+            self.received += 1
+            aggregate = self._windows.get(key)
+            if aggregate is None:
+                if len(self._windows) >= self.max_keys:
+                    expired.append(self._windows.popitem(last=False)[1])
+                aggregate = {'alert': alert, 'count': 1, 'firstSeen': now, 'lastSeen': now,
+                             'firstAlertId': alert.get('alertId'), 'lastAlertId': alert.get('alertId')}
+                self._windows[key] = aggregate
+                first = dict(aggregate)
+            else:
+                aggregate['count'] += 1
+                aggregate['lastSeen'] = now
+                aggregate['lastAlertId'] = alert.get('alertId')
+                # keep the most severe classification seen in the window
+                if SEVERITY_RANK.get(alert.get('severity'), 0) > SEVERITY_RANK.get(aggregate['alert'].get('severity'), 0):
+                    aggregate['alert'] = dict(aggregate['alert'], severity=alert['severity'])
+        if first is not None:
+            self._emit(first)
+        for aggregate in expired:
+            self._emit_summary(aggregate)
+
+    def flush(self, now=None, force=False):
+        """Close every window older than window_seconds (all of them if force), emitting their summaries."""
+        now = time.time() if now is None else now
+        expired = []
+        with self._lock:
+            # windows are in opening order, so stop at the first still-open one
+            while self._windows:
+                key, aggregate = next(iter(self._windows.items()))
+                if not force and now - aggregate['firstSeen'] < self.window:
+                    break
+                del self._windows[key]
+                expired.append(aggregate)
+        for aggregate in expired:
+            self._emit_summary(aggregate)
+        return len(expired)
+
+    def close(self):
+        """Stop the background flusher and close every open window."""
+        self._stopping.set()
+        if self._flusher is not None:
+            self._flusher.join()
+        self.flush(force=True)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'received': self.received,
+                'emitted': self.emitted,
+                'openWindows': len(self._windows),
+                'suppressionRatio': round(1 - self.emitted / self.received, 4) if self.received else 0.0
+            }
+
+    def _run(self):
+        interval = min(1.0, self.window / 2)
+        while not self._stopping.wait(interval):
+            self.flush()
+
+    def _emit_summary(self, aggregate):
+        """Report a closed window, unless it only ever held the alert already sent."""
+        if aggregate['count'] < 2:
+            return
+        self._emit(aggregate, summary=True)
+
+    def _emit(self, aggregate, summary=False):
+        alert = dict(aggregate['alert'])
+        if summary:
+            alert['alertId'] = aggregate['lastAlertId']
+            alert['firstAlertId'] = aggregate['firstAlertId']
+        count = aggregate['count']
+        first = aggregate['firstSeen']
+        last = aggregate['lastSeen']
+
+        alert['count'] = count
+        alert['firstSeen'] = int(first)
+        alert['lastSeen'] = int(last)
+        if count > 1:
+            alert['logData'] = f"{alert['logData']} (x{count}, {int(last - first)}s)"
+        for field in ('msg', 'src', 'dst', 'proto'):
+            alert.pop(field, None)
+
+        with self._lock:
+            self.emitted += 1
+        self.emit(alert)
@@ -0,0 +1,340 @@
+import json
+import os
+import queue
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from instrumentation import stage, counter, get_logger
+
+log = get_logger('shipper')
+
+# ------------------------------------------------------------
+# Alert Shipping
+# ------------------------------------------------------------
+# Collectors hand alerts to AlertShipper.submit(), which never waits on
+# the network: alerts go into a bounded in-memory queue and background
+# workers POST them to the backend in batches over keep-alive
+# connections. Failed batches are retried with exponential backoff and,
+# if the backend stays down (or the queue is full), appended to an
+# on-disk spill file that is replayed once the backend answers again.
+#
+# A replay moves the spill file to <spill>.replay and sends it one batch
+# at a time, saving the byte offset of what was delivered in
+# <spill>.replay.offset. The file is only removed once every batch is
+# through, so a shutdown or crash mid-replay leaves the rest on disk and
+# the next start resumes from the saved offset (resending at most the
+# batch that was in flight).
+
+BACKEND_API_URL = 'http://127.0.0.1:3001/api/log-alert'
+BACKEND_BATCH_API_URL = 'http://127.0.0.1:3001/api/log-alert/batch'
+
+
+class PermanentShipError(Exception):
+    """The backend rejected a batch in a way a retry will not fix (4xx)."""
+
+
+class AlertShipper:
+    def __init__(self, url=BACKEND_API_URL, batch_url=BACKEND_BATCH_API_URL, headers=None,
+                 max_queue=10000, batch_size=50, flush_interval=1.0, workers=2,
+                 max_retries=4, backoff_base=0.5, backoff_max=30.0, timeout=10, per_alert_timeout=1.0,
+                 spill_file='alert_spill.jsonl', spill_max_bytes=100 * 1024 * 1024):
+        """
+        url: single-alert endpoint, used when batch_url is None or the
+             backend does not know the batch endpoint (404).
+        batch_url: endpoint taking {"alerts": [...]}.
+        batch_size / flush_interval: a batch is sent when it holds
+             batch_size alerts or its oldest alert waited flush_interval s.
+        timeout / per_alert_timeout: a request may take timeout s plus
+             per_alert_timeout s per alert it carries (the backend handles
+             a batch one on-chain transaction at a time).
+        """
+        self.url = url
+        self.batch_url = batch_url
+        self.batch_size = max(1, int(batch_size))
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self.per_alert_timeout = per_alert_timeout
+        self.spill_file = spill_file
+        self.spill_max_bytes = spill_max_bytes
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, workers))
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        if headers:
+            self.session.headers.update(headers)
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._spill_lock = threading.Lock()
+        self._replay_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._replay_after = 0.0
+        self._counters = {
+            'submitted': 0,
+            'sent': 0,
+            'batches': 0,
+            'retries': 0,
+            'rejected': 0,
+            'spilled': 0,
+            'replayed': 0,
+            'dropped': 0
+        }
+
+        self._workers = [
+            threading.Thread(target=self._run, name=f'alert-shipper-{i}', daemon=True)
+            for i in range(max(1, workers))
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    # --------------------------------------------------------
+    # Producer side
+    # --------------------------------------------------------
+    def submit(self, alert):
+        """Queue one alert without blocking; spills to disk if the queue is full."""
+        self._count('submitted')
+        try:
+            self._queue.put_nowait(alert)
+        except queue.Full:
+            self._spill([alert])
+
+    def close(self, timeout=10.0):
+        """Flush what is queued (spilling whatever cannot be sent) and stop."""
+        self._stopping.set()
+        deadline = time.monotonic() + timeout
+        for worker in self._workers:
+            worker.join(max(0.0, deadline - time.monotonic()))
+        leftover = []
+        while True:
+            try:
+                leftover.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        if leftover:
+            self._spill(leftover)
+        self.session.close()
+
+    def stats(self):
+        with self._stats_lock:
+            counters = dict(self._counters)
+        counters['queueDepth'] = self._queue.qsize()
+        counters['spillBytes'] = 0
+        for path in (self.spill_file, self.replay_file):
+            try:
+                counters['spillBytes'] += os.path.getsize(path)
+            except OSError:
+                pass
+        return counters
+
+    @property
+    def replay_file(self):
+        return self.spill_file + '.replay'
+
+    # --------------------------------------------------------
+    # Worker side
+    # --------------------------------------------------------
+    def _count(self, name, n=1):
+        with self._stats_lock:
+            self._counters[name] += n
+        counter('shipper_events_total', 'Alert shipper events (sent, retries, spilled, ...)', event=name).inc(n)
+
+    def _collect(self):
+        try:
+            batch = [self._queue.get(timeout=self.flush_interval)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while not (self._stopping.is_set() and self._queue.empty()):
+            batch = self._collect()
+            if batch:
+                if self._deliver(batch):
+                    self._replay_spill()
+            elif not self._stopping.is_set():
+                # idle: a good moment to drain alerts spilled while the backend was down
+                self._replay_spill()
+
+    def _post(self, batch):
+        """POST a batch; returns the alerts the backend failed on and should get again."""
+        if self.batch_url:
+            r = self.session.post(self.batch_url, json={'alerts': batch},
+                                  timeout=self.timeout + self.per_alert_timeout * len(batch))
+            if r.status_code == 404:
+                # older backend without the batch endpoint
+                log.warning("Batch endpoint not found, falling back to single-alert posts.")
+                self.batch_url = None
+            else:
+                self._check_response(r)
+                return self._split_results(batch, r)
+        for i, alert in enumerate(batch):
+            try:
+                self._check_response(self.session.post(self.url, json=alert,
+                                                       timeout=self.timeout + self.per_alert_timeout))
+            except PermanentShipError as e:
+                log.error("Backend rejected alert %s: %s", alert.get('alertId'), e)
+                self._count('rejected')
+                continue
+            except requests.exceptions.RequestException:
+                if i == 0:
+                    raise
+                # the alerts before this one went through
+                return batch[i:]
+            self._count('sent')
+        return []
+
+    def _split_results(self, batch, r):
+        """Count the per-alert results of a batch response; returns the alerts to resend."""
+        try:
+            results = r.json().get('results')
+        except (ValueError, AttributeError):
+            results = None
+        if not isinstance(results, list) or len(results) != len(batch):
+            # no per-alert detail: the 2xx covers the whole batch
+            self._count('sent', len(batch))
+            return []
+        retry = []
+        for alert, result in zip(batch, results):
+            if not isinstance(result, dict) or 'error' not in result:
+                self._count('sent')
+            elif result.get('retryable'):
+                retry.append(alert)
+            else:
+                log.error("Backend rejected alert %s: %s", alert.get('alertId'), result['error'])
+                self._count('rejected')
+        return retry
+
+    @staticmethod
+    def _check_response(r):
+        if 400 <= r.status_code < 500 and r.status_code not in (408, 429):
+            raise PermanentShipError(f"{r.status_code} {r.text[:200]}")
+        r.raise_for_status()
+
+    def _deliver(self, batch):
+        """
+        Send one batch with retries; returns True once the backend has
+        taken (or permanently rejected) every alert. Only the alerts the
+        backend failed on are resent.
+        """
+        pending = batch
+        for attempt in range(self.max_retries + 1):
+            try:
+                with stage('ship'):
+                    pending = self._post(pending)
+                if not pending:
+                    self._count('batches')
+                    self._replay_after = 0.0
+                    return True
+                error = f"backend failed on {len(pending)} alerts"
+            except PermanentShipError as e:
+                log.error("Backend rejected batch of %d alerts: %s", len(pending), e)
+                self._count('rejected', len(pending))
+                return True
+            except requests.exceptions.RequestException as e:
+                error = e
+            if attempt == self.max_retries or self._stopping.is_set():
+                log.error("Backend unreachable, spilling %d alerts to disk: %s", len(pending), error)
+                break
+            self._count('retries')
+            time.sleep(min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+        # leave the spill file alone for a while before trying to replay it
+        self._replay_after = time.monotonic() + self.backoff_max
+        self._spill(pending)
+        return False
+
+    # --------------------------------------------------------
+    # On-disk spill buffer
+    # --------------------------------------------------------
+    def _spill(self, alerts):
+        if not alerts:
+            return
+        with self._spill_lock:
+            try:
+                size = os.path.getsize(self.spill_file)
+            except OSError:
+                size = 0
+            if size >= self.spill_max_bytes:
+                self._count('dropped', len(alerts))
+                return
+            with open(self.spill_file, 'a', encoding='utf-8') as f:
+                for alert in alerts:
+                    f.write(json.dumps(alert) + '\n')
+        self._count('spilled', len(alerts))
+
+    def _replay_spill(self):
+        """Send spilled alerts, starting with a replay left unfinished by an earlier run."""
+        if self._stopping.is_set() or time.monotonic() < self._replay_after:
+            return
+        # only one worker replays at a time
+        if not self._replay_lock.acquire(blocking=False):
+            return
+        try:
+            if not os.path.exists(self.replay_file):
+                # move the spill file aside so new spills during the replay go to a fresh one
+                with self._spill_lock:
+                    if not os.path.exists(self.spill_file):
+                        return
+                    os.replace(self.spill_file, self.replay_file)
+                    # an offset left by a crash between the two removes below
+                    if os.path.exists(self.replay_file + '.offset'):
+                        os.remove(self.replay_file + '.offset')
+            self._replay(self.replay_file)
+        finally:
+            self._replay_lock.release()
+
+    def _replay(self, replay_file):
+        offset_file = replay_file + '.offset'
+        try:
+            with open(offset_file, encoding='utf-8') as f:
+                offset = int(f.read().strip() or 0)
+        except (OSError, ValueError):
+            offset = 0
+
+        with open(replay_file, 'rb') as f:
+            f.seek(offset)
+            while True:
+                alerts = []
+                for line in f:
+                    try:
+                        alerts.append(json.loads(line))
+                    except ValueError:
+                        # torn line from a crash mid-write
+                        continue
+                    if len(alerts) >= self.batch_size:
+                        break
+                if not alerts:
+                    break
+                if self._stopping.is_set():
+                    # the rest stays on disk for the next start
+                    return
+                delivered = self._deliver(alerts)
+                # either delivered or, if the backend is down again, spilled
+                # to the fresh spill file by _deliver; skip it in both cases
+                offset = f.tell()
+                tmp = offset_file + '.tmp'
+                with open(tmp, 'w', encoding='utf-8') as out:
+                    out.write(str(offset))
+                os.replace(tmp, offset_file)
+                if not delivered:
+                    return
+                self._count('replayed', len(alerts))
+
+        os.remove(replay_file)
+        if os.path.exists(offset_file):
+            os.remove(offset_file)
@@ -1,24 +1,74 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response
 from flask_cors import CORS
 import joblib as jl
 import traceback as tb
+import os
+from microBatcher import MicroBatcher
+from predictionCache import PredictionCache
+from fastScorer import FastScorer
+from instrumentation import stage, counter, gauge, render_metrics, SampledProfiler, get_logger
 
 # ------------------------------------------------------------
 # Flask App Initialization
 # ------------------------------------------------------------
 app = Flask(__name__)
 CORS(app)
+log = get_logger('app')
 
 # defining the loaded model
 loadedModel = 'finalTrainedModel.joblib'
+modelVersion = 'v1.1-logistic-regression'
 pipeLine = None
 
+# compact artifact exported by model.py; when present it is scored by the
+# lean NumPy FastScorer instead of the sklearn Pipeline (same results)
+fastModel = 'finalTrainedModel.fast'
+USE_FAST_SCORER = os.environ.get('USE_FAST_SCORER', '1') != '0'
+
+# memory-map the model's NumPy arrays instead of reading them into the
+# heap; serve.py turns this on so pre-forked workers share the pages
+MODEL_MMAP = os.environ.get('MODEL_MMAP', '0') == '1'
+
+# fraction of predict calls profiled with cProfile (0 = off); the
+# accumulated profile is served on /debug/profile
+PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', 0))
+
+# upper bound on the number of log lines accepted by /predict/batch
+MAX_BATCH_SIZE = int(os.environ.get('MAX_BATCH_SIZE', 1000))
+
+# micro-batching of concurrent single-line /predict calls
+MICRO_BATCH_MAX_SIZE = int(os.environ.get('MICRO_BATCH_MAX_SIZE', 64))
+MICRO_BATCH_MAX_WAIT_MS = float(os.environ.get('MICRO_BATCH_MAX_WAIT_MS', 5))
+
+# prediction cache in front of the model; masks are a comma separated
+# subset of "ips,ports,pids" (off by default, see predictionCache.py)
+CACHE_MAX_ENTRIES = int(os.environ.get('CACHE_MAX_ENTRIES', 10000))
+CACHE_TTL_SECONDS = float(os.environ.get('CACHE_TTL_SECONDS', 3600))
+CACHE_MASK = [m for m in os.environ.get('CACHE_MASK', '').split(',') if m]
+
 # ------------------------------------------------------------
 # Load the Trained Model
 # ------------------------------------------------------------
+def model_file():
+    """The file whose size/mtime changes when a new model is dropped in."""
+    if USE_FAST_SCORER and os.path.isdir(fastModel):
+        return os.path.join(fastModel, 'meta.json')
+    return loadedModel
+
+
+def load_model(mmap=MODEL_MMAP):
+    """Load the fast artifact if present, else the joblib pipeline. Returns (model, version)."""
+    if USE_FAST_SCORER and os.path.isdir(fastModel):
+        model = FastScorer.load(fastModel, mmap=mmap)
+        log.info("Fast scorer loaded successfully from: %s", fastModel)
+        return model, model.model_version
+    model = jl.load(loadedModel, mmap_mode='r' if mmap else None)
+    log.info("Model loaded successfully from: %s", loadedModel)
+    return model, 'v1.1-logistic-regression'
+
+
 try:
-    pipeLine = jl.load(loadedModel)
-    print("✅ Model loaded successfully from:", loadedModel)
+    pipeLine, modelVersion = load_model()
 except FileNotFoundError:
     print(f"❌ Error: The model file '{loadedModel}' was not found.")
     print("Please ensure you've trained and saved the model using model.py first.")
@@ -28,6 +78,90 @@ except Exception as e:
     print(tb.format_exc())
     exit()
 
+# ------------------------------------------------------------
+# Scoring Helpers
+# ------------------------------------------------------------
+def format_prediction(probs):
+    """Build the JSON response for one row of predict_proba output."""
+    # argmax of the probabilities is the same label pipeLine.predict gives,
+    # so a single predict_proba pass is enough (TF-IDF runs only once)
+    best = int(probs.argmax())
+    prediction = int(pipeLine.classes_[best])
+    return {
+        'isSuspicious': bool(prediction),
+        'confidence': round(float(probs[best]), 4),
+        'modelVersion': modelVersion,
+        'predictionLabel': 'Suspicious' if prediction == 1 else 'Safe'
+    }
+
+
+profiler = SampledProfiler(PROFILE_SAMPLE_RATE)
+predictions_total = counter('predictions_total', 'Log lines scored by the model')
+
+
+def predict_proba(model, logs):
+    """model.predict_proba(logs), timing the vectorize and predict stages separately."""
+    if isinstance(model, FastScorer):
+        with stage('vectorize'):
+            features = model.transform(logs)
+        with stage('predict'):
+            return model.predict_proba_features(features)
+    vectorizer, classifier = model.steps[0][1], model.steps[-1][1]
+    with stage('vectorize'):
+        features = vectorizer.transform(logs)
+    with stage('predict'):
+        return classifier.predict_proba(features)
+
+
+def score_logs(logs):
+    """Vectorize and score a list of log strings in one pipeline call."""
+    with profiler.maybe_profile():
+        probs = predict_proba(pipeLine, logs)
+    predictions_total.inc(len(logs))
+    return [format_prediction(row) for row in probs]
+
+
+batcher = MicroBatcher(score_logs, max_batch_size=MICRO_BATCH_MAX_SIZE, max_wait_ms=MICRO_BATCH_MAX_WAIT_MS)
+predictionCache = PredictionCache(
+    max_entries=CACHE_MAX_ENTRIES,
+    ttl_seconds=CACHE_TTL_SECONDS,
+    mask=CACHE_MASK,
+    model_path=model_file()
+)
+
+gauge('microbatch_queue_depth', 'Lines waiting in the micro-batcher', lambda: batcher.stats()['queueDepth'])
+gauge('microbatch_avg_batch_size', 'Average micro-batch size', lambda: batcher.stats()['avgBatchSize'])
+gauge('prediction_cache_entries', 'Entries in the prediction cache', lambda: predictionCache.stats()['size'])
+gauge('prediction_cache_lookups', 'Prediction cache lookups by result', lambda: {
+    (('result', 'hit'),): predictionCache.stats()['hits'],
+    (('result', 'miss'),): predictionCache.stats()['misses']
+})
+
+
+def reload_model():
+    """Swap in the model currently on disk (hot reload); keeps the old one on failure."""
+    global pipeLine, modelVersion
+    try:
+        pipeLine, modelVersion = load_model()
+    except Exception:
+        log.exception("Model reload failed, keeping the previous model")
+        return False
+    predictionCache.clear()
+    return True
+
+
+def score_logs_cached(logs):
+    """score_logs, answering repeated lines from predictionCache."""
+    results = [predictionCache.get(log) for log in logs]
+    missing = [i for i, result in enumerate(results) if result is None]
+    if missing:
+        scored = score_logs([logs[i] for i in missing])
+        for i, response in zip(missing, scored):
+            results[i] = response
+            predictionCache.put(logs[i], response)
+    return results
+
+
 # ------------------------------------------------------------
 # Prediction Route
 # ------------------------------------------------------------
@@ -49,35 +183,110 @@ def predict():
         if not log_data:
             return jsonify({'error': "Missing 'logData' field in JSON payload."}), 400
 
-        print(f"📝 Received log data for prediction: {log_data}")
-
-        # Predict
-        log_data = [log_data]
-        prediction = pipeLine.predict(log_data)[0]
-        confidence_probs = pipeLine.predict_proba(log_data)[0]
-        confidence = round(float(confidence_probs[prediction]), 4)
+        log.debug("Received log data for prediction: %s", log_data)
 
-        # Format response
-        response = {
-            'isSuspicious': bool(prediction),
-            'confidence': confidence,
-            'modelVersion': 'v1.1-logistic-regression',
-            'predictionLabel': 'Suspicious' if prediction == 1 else 'Safe'
-        }
+        # Predict (cache misses are scored together with any other lines
+        # arriving concurrently)
+        response = predictionCache.get(log_data)
+        if response is None:
+            response = batcher.submit(log_data)
+            predictionCache.put(log_data, response)
 
-        print(f"✅ Prediction Result: {response}")
+        log.debug("Prediction result: %s", response)
         return jsonify(response), 200
 
     except Exception as e:
-        print(f"❌ Error during prediction: {e}")
-        print(tb.format_exc())
+        log.exception("Error during prediction")
+        return jsonify({'error': 'Internal Server Error', 'details': str(e)}), 500
+
+
+@app.route('/predict/batch', methods=['POST'])
+def predict_batch():
+    """
+    POST JSON format:
+    {
+        "logs": [
+            "Credential Manager credentials were read.",
+            "User logon successful at workstation."
+        ]
+    }
+
+    Returns {"results": [...]} with one entry per input line, in input
+    order. Entries that are not non-empty strings get an 'error' field
+    instead of a prediction; the rest of the batch is still scored.
+    """
+    if not pipeLine:
+        return jsonify({'error': 'Model not loaded on server!'}), 500
+
+    try:
+        data = request.get_json(force=True)
+        logs = data.get('logs')
+
+        if not isinstance(logs, list) or not logs:
+            return jsonify({'error': "Missing or empty 'logs' array in JSON payload."}), 400
+
+        if len(logs) > MAX_BATCH_SIZE:
+            return jsonify({'error': f"Batch too large: {len(logs)} lines (max {MAX_BATCH_SIZE})."}), 413
+
+        valid = [i for i, log in enumerate(logs) if isinstance(log, str) and log]
+        results = [{'error': "Log entry must be a non-empty string."}] * len(logs)
+
+        if valid:
+            scored = score_logs_cached([logs[i] for i in valid])
+            for i, response in zip(valid, scored):
+                results[i] = response
+
+        log.debug("Scored batch of %d/%d log lines", len(valid), len(logs))
+        return jsonify({'results': results}), 200
+
+    except Exception as e:
+        log.exception("Error during batch prediction")
         return jsonify({'error': 'Internal Server Error', 'details': str(e)}), 500
 
 
+@app.route('/predict/stats', methods=['GET'])
+def predict_stats():
+    """Micro-batcher queue depth, batch-size histogram and cache stats."""
+    return jsonify({
+        'microBatcher': batcher.stats(),
+        'predictionCache': predictionCache.stats()
+    }), 200
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus text exposition of the stage timings, counters and gauges."""
+    return Response(render_metrics(), mimetype='text/plain; version=0.0.4')
+
+
+@app.route('/debug/profile', methods=['GET'])
+def debug_profile():
+    """Accumulated cProfile output of the sampled predict calls."""
+    return Response(profiler.report(), mimetype='text/plain')
+
+
+# ------------------------------------------------------------
+# Health / Readiness
+# ------------------------------------------------------------
+@app.route('/healthz', methods=['GET'])
+def healthz():
+    """Liveness: the process is up and serving HTTP."""
+    return jsonify({'status': 'ok', 'pid': os.getpid()}), 200
+
+
+@app.route('/readyz', methods=['GET'])
+def readyz():
+    """Readiness: a model is loaded and requests can be scored."""
+    if not pipeLine:
+        return jsonify({'ready': False, 'pid': os.getpid()}), 503
+    return jsonify({'ready': True, 'modelVersion': modelVersion, 'pid': os.getpid()}), 200
+
+
 # ------------------------------------------------------------
 # Run Flask App
 # ------------------------------------------------------------
 if __name__ == '__main__':
     print("🚀 Starting Flask API for PC Log Classification...")
     print(f"Listening on http://127.0.0.1:5000/predict")
+    print(f"Batch endpoint on http://127.0.0.1:5000/predict/batch (max {MAX_BATCH_SIZE} lines)")
     app.run(port=5000, debug=True)
@@ -0,0 +1,489 @@
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import requests
+
+from alertShipper import AlertShipper
+from logMonitor import SAFE_LOGS, SUSPICIOUS_LOGS
+from logTailer import LogTailer
+from model import peak_memory_mb
+
+# ------------------------------------------------------------
+# End-to-End Load Generator + Benchmark Suite
+# ------------------------------------------------------------
+# Synthesizes (or replays) alert.fast lines and event-log text at a
+# configurable rate, suspicious/safe mix and cardinality, and drives:
+#
+#   snort    alert.fast file -> LogTailer -> snort_parser.handle_line
+#            (parse, classify, dedup) -> AlertShipper -> stub backend
+#   predict  the /predict (or /predict/batch) endpoint of app.py, started
+#            in-process unless --predict-url points at a running server
+#   ship     AlertShipper -> stub backend, submit-to-arrival latency
+#
+# The stub backend stands in for the Node server's /api/log-alert and
+# /api/log-alert/batch routes, so nothing outside this process is needed.
+# --rate 0 runs closed-loop (as fast as possible); a positive rate is
+# open-loop, latency counted from each item's scheduled time so a stalled
+# pipeline shows up in p99 instead of silently lowering the offered load.
+#
+# Throughput, p50/p90/p99/max latency and peak RSS per scenario are
+# written to --output together with the git commit; --compare OLD.json
+# prints the change against an earlier run. Each scenario runs in a fresh
+# interpreter: ru_maxrss only ever grows, so in one process every scenario
+# would report the largest peak of the ones before it. startRssMb is that
+# interpreter after imports, so peakRssMb - startRssMb is the scenario's own.
+
+SCENARIOS = ['snort', 'predict', 'ship']
+SNORT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'snort-integration')
+
+# (gid, sid, message, classification, priority); the first group is what
+# snort_rules.json rates High
+SUSPICIOUS_SNORT_ALERTS = [
+    (1, 1000001, "Nmap TCP SYN scan detected", "Attempted Information Leak", 2),
+    (1, 2001219, "ET SCAN Potential SSH Scan", "Attempted Information Leak", 2),
+    (1, 1000003, "Possible port scan reconnaissance", "Detection of a Network Scan", 3),
+    (1, 2010937, "ET SCAN Suspicious inbound to mySQL port 3306", "Potentially Bad Traffic", 2)
+]
+SAFE_SNORT_ALERTS = [
+    (1, 1000002, "ICMP Ping detected", "Misc activity", 3),
+    (1, 2100366, "GPL ICMP_INFO PING *NIX", "Misc activity", 3),
+    (1, 2013504, "ET POLICY GNU/Linux APT User-Agent Outbound", "Not Suspicious Traffic", 3),
+    (129, 12, "Consecutive TCP small segments exceeding threshold", "Potentially Bad Traffic", 3)
+]
+PROTOCOLS = ['TCP', 'TCP', 'UDP', 'ICMP']
+DESTINATIONS = ['192.168.1.10', '192.168.1.20', '192.168.1.30']
+
+
+# ------------------------------------------------------------
+# Workload generation
+# ------------------------------------------------------------
+def host(i):
+    return f"10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}"
+
+
+def synth_snort_lines(n, mix, cardinality, seed):
+    """n alert.fast lines; mix = suspicious share, cardinality = distinct source hosts."""
+    rng = random.Random(seed)
+    lines = []
+    for _ in range(n):
+        gid, sid, msg, classification, priority = rng.choice(
+            SUSPICIOUS_SNORT_ALERTS if rng.random() < mix else SAFE_SNORT_ALERTS)
+        stamp = datetime.now().strftime('%m/%d-%H:%M:%S.%f')
+        src = f"{host(rng.randrange(cardinality))}:{rng.randrange(1024, 65536)}"
+        dst = f"{rng.choice(DESTINATIONS)}:{rng.choice([22, 80, 443, 3306])}"
+        lines.append(f"{stamp}  [**] [{gid}:{sid}:1] {msg} [**] [Classification: {classification}] "
+                     f"[Priority: {priority}] {{{rng.choice(PROTOCOLS)}}} {src} -> {dst}")
+    return lines
+
+
+def synth_event_logs(n, mix, cardinality, seed):
+    """n event-log lines from logMonitor's templates, spread over `cardinality` workstations."""
+    rng = random.Random(seed)
+    logs = []
+    for _ in range(n):
+        template = rng.choice(SUSPICIOUS_LOGS if rng.random() < mix else SAFE_LOGS)
+        logs.append(f"{template} Workstation: WS-{rng.randrange(cardinality):05d}")
+    return logs
+
+
+def read_lines(path, n):
+    with open(path, encoding='utf-8', errors='replace') as f:
+        lines = [line.rstrip('\r\n') for line in f if line.strip()]
+    return lines[:n] if n else lines
+
+
+def paced(n, rate):
+    """Scheduled send offsets in seconds (all zero for closed-loop runs)."""
+    if rate <= 0:
+        return np.zeros(n)
+    return np.arange(n) / rate
+
+
+def summarize(latencies, count, elapsed):
+    ms = np.asarray(latencies, dtype=float) * 1000.0
+    peak = peak_memory_mb()
+    return {
+        'count': count,
+        'seconds': round(elapsed, 3),
+        'throughputPerSecond': round(count / elapsed, 1) if elapsed > 0 else 0.0,
+        'latencyMs': {
+            'p50': round(float(np.percentile(ms, 50)), 3) if len(ms) else None,
+            'p90': round(float(np.percentile(ms, 90)), 3) if len(ms) else None,
+            'p99': round(float(np.percentile(ms, 99)), 3) if len(ms) else None,
+            'max': round(float(ms.max()), 3) if len(ms) else None
+        },
+        'peakRssMb': round(peak, 1) if peak is not None else None
+    }
+
+
+# ------------------------------------------------------------
+# Stand-in backend
+# ------------------------------------------------------------
+class StubBackend:
+    """Accepts /api/log-alert and /api/log-alert/batch and records when each alertId arrived."""
+
+    def __init__(self, delay_ms=0, host='127.0.0.1', port=0):
+        self.delay = delay_ms / 1000.0
+        self.received = {}
+        self.requests = 0
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'  # keep-alive, like Express
+            disable_nagle_algorithm = True  # headers and body go out in separate writes
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                if self.path == '/api/log-alert/batch':
+                    alerts = json.loads(body).get('alerts', [])
+                elif self.path == '/api/log-alert':
+                    alerts = [json.loads(body)]
+                else:
+                    self.send_error(404)
+                    return
+                if stub.delay:
+                    time.sleep(stub.delay)
+                stub.record(alerts)
+                reply = json.dumps({'results': [{'alertId': a.get('alertId'), 'status': 201} for a in alerts]}).encode()
+                self.send_response(201)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(reply)))
+                self.end_headers()
+                self.wfile.write(reply)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        base = f"http://{host}:{self.server.server_address[1]}"
+        self.url = base + '/api/log-alert'
+        self.batch_url = base + '/api/log-alert/batch'
+        threading.Thread(target=self.server.serve_forever, name='stub-backend', daemon=True).start()
+
+    def record(self, alerts):
+        now = time.perf_counter()
+        with self._lock:
+            self.requests += 1
+            for alert in alerts:
+                self.received[alert.get('alertId')] = now
+
+    def reset(self):
+        with self._lock:
+            self.received = {}
+            self.requests = 0
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+# ------------------------------------------------------------
+# Scenarios
+# ------------------------------------------------------------
+def bench_snort(lines, rate, stub, workdir):
+    """Append lines to an alert.fast file and time tail + parse + classify + dedup per line."""
+    if SNORT_DIR not in sys.path:
+        sys.path.append(SNORT_DIR)
+    import snort_parser
+
+    # point the parser's shipping stage at the stub backend
+    snort_parser.shipper.close(timeout=1)
+    snort_parser.shipper = AlertShipper(url=stub.url, batch_url=stub.batch_url,
+                                        spill_file=os.path.join(workdir, 'bench_snort_spill.jsonl'))
+    stub.reset()
+
+    path = os.path.join(workdir, 'alert.fast')
+    open(path, 'w').close()
+    tailer = LogTailer(path, start_at_end=False)
+    written = np.zeros(len(lines))
+    offsets = paced(len(lines), rate)
+
+    def writer():
+        start = time.perf_counter()
+        with open(path, 'a', encoding='utf-8') as f:
+            i = 0
+            while i < len(lines):
+                due = start + offsets[i]
+                wait = due - time.perf_counter()
+                if wait > 0:
+                    time.sleep(wait)
+                # write everything that is due in one go, like Snort's buffered output
+                j = i
+                now = time.perf_counter() - start
+                while j < len(lines) and offsets[j] <= now:
+                    j += 1
+                j = max(j, i + 1)
+                written[i:j] = start + offsets[i:j] if rate > 0 else time.perf_counter()
+                f.write('\n'.join(lines[i:j]) + '\n')
+                f.flush()
+                i = j
+
+    thread = threading.Thread(target=writer, name='alert-writer', daemon=True)
+    start = time.perf_counter()
+    thread.start()
+    latencies = []
+    matched = 0
+    for batch in tailer.batches():
+        for line in batch:
+            if snort_parser.handle_line(line):
+                matched += 1
+            latencies.append(time.perf_counter() - written[len(latencies)])
+        if len(latencies) >= len(lines):
+            break
+    elapsed = time.perf_counter() - start
+    thread.join()
+    tailer.close()
+
+    # flush the dedup windows and wait for the shipper to drain
+    drain_start = time.perf_counter()
+    snort_parser.aggregator.close()
+    snort_parser.shipper.close()
+    result = summarize(latencies, len(lines), elapsed)
+    dedup = snort_parser.aggregator.stats()
+    result.update({
+        'matched': matched,
+        'alertsShipped': len(stub.received),
+        'backendRequests': stub.requests,
+        'suppressionRatio': dedup['suppressionRatio'],
+        'drainSeconds': round(time.perf_counter() - drain_start, 3),
+        'rules': snort_parser.rules.stats()
+    })
+    return result
+
+
+def start_local_app():
+    """Run app.py's Flask app on an ephemeral port in this process."""
+    from werkzeug.serving import make_server
+    import app as ml_app
+
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)  # no access log line per request
+    server = make_server('127.0.0.1', 0, ml_app.app, threaded=True)
+    threading.Thread(target=server.serve_forever, name='predict-server', daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+def bench_predict(logs, rate, concurrency, base_url, batch_size):
+    """Drive /predict (or /predict/batch) from `concurrency` client threads."""
+    if batch_size > 0:
+        requests_ = [logs[i:i + batch_size] for i in range(0, len(logs), batch_size)]
+        url = base_url + '/predict/batch'
+    else:
+        requests_ = logs
+        url = base_url + '/predict'
+    offsets = paced(len(requests_), rate / batch_size if batch_size > 0 else rate)
+    local = threading.local()
+    errors = []
+
+    def session():
+        if not hasattr(local, 'session'):
+            local.session = requests.Session()
+        return local.session
+
+    def call(i):
+        due = start + offsets[i]
+        wait = due - time.perf_counter()
+        if wait > 0:
+            time.sleep(wait)
+        sent = due if rate > 0 else time.perf_counter()
+        payload = {'logs': requests_[i]} if batch_size > 0 else {'logData': requests_[i]}
+        try:
+            r = session().post(url, json=payload, timeout=30)
+            if r.status_code != 200:
+                errors.append(r.status_code)
+        except requests.exceptions.RequestException as e:
+            errors.append(type(e).__name__)
+        return time.perf_counter() - sent
+
+    session().get(base_url + '/healthz', timeout=10)  # warm-up / liveness
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(call, range(len(requests_))))
+    elapsed = time.perf_counter() - start
+
+    result = summarize(latencies, len(logs), elapsed)
+    result.update({
+        'requests': len(requests_),
+        'batchSize': batch_size or 1,
+        'concurrency': concurrency,
+        'errors': len(errors)
+    })
+    try:
+        result['server'] = requests.get(base_url + '/predict/stats', timeout=10).json()
+    except (requests.exceptions.RequestException, ValueError):
+        pass
+    return result
+
+
+def bench_ship(logs, rate, stub, workdir):
+    """Submit alerts to an AlertShipper and time their arrival at the stub backend."""
+    stub.reset()
+    shipper = AlertShipper(url=stub.url, batch_url=stub.batch_url,
+                           spill_file=os.path.join(workdir, 'bench_ship_spill.jsonl'))
+    offsets = paced(len(logs), rate)
+    submitted = {}
+    start = time.perf_counter()
+    for i, text in enumerate(logs):
+        due = start + offsets[i]
+        wait = due - time.perf_counter()
+        if wait > 0:
+            time.sleep(wait)
+        alert_id = f"BENCH-{i}"
+        submitted[alert_id] = due if rate > 0 else time.perf_counter()
+        shipper.submit({'alertId': alert_id, 'sourceType': 'Benchmark', 'severity': 'Low', 'logData': text})
+    shipper.close(timeout=60)
+    elapsed = time.perf_counter() - start
+
+    latencies = [stub.received[a] - t for a, t in submitted.items() if a in stub.received]
+    result = summarize(latencies, len(logs), elapsed)
+    result.update({
+        'delivered': len(latencies),
+        'backendRequests': stub.requests,
+        'shipper': shipper.stats()
+    })
+    return result
+
+
+def run_scenario(name, args, snort_lines, event_logs):
+    """Run one scenario with its own stub backend and work dir (called in a fresh process)."""
+    start_rss = peak_memory_mb()
+    stub = StubBackend(delay_ms=args.backend_delay_ms)
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            if name == 'snort':
+                result = bench_snort(snort_lines, args.rate, stub, workdir)
+            elif name == 'predict':
+                server = None
+                base_url = args.predict_url
+                if not base_url:
+                    server, base_url = start_local_app()
+                try:
+                    result = bench_predict(event_logs, args.rate, args.concurrency,
+                                           base_url.rstrip('/'), args.predict_batch)
+                finally:
+                    if server is not None:
+                        server.shutdown()
+            elif name == 'ship':
+                result = bench_ship(event_logs, args.rate, stub, workdir)
+    finally:
+        stub.close()
+    result['startRssMb'] = round(start_rss, 1) if start_rss is not None else None
+    return result
+
+
+# ------------------------------------------------------------
+# Results
+# ------------------------------------------------------------
+def git_commit():
+    try:
+        out = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                             cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10)
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def print_scenario(name, r):
+    lat = r['latencyMs']
+    print(f"{name:<9}{r['count']:>9}{r['throughputPerSecond']:>12.1f}{lat['p50'] or 0:>10.3f}"
+          f"{lat['p99'] or 0:>10.3f}{lat['max'] or 0:>10.3f}{r['peakRssMb'] or 0:>10.1f}"
+          f"{r.get('startRssMb') or 0:>10.1f}")
+
+
+def compare(old, new):
+    print(f"\n-- Compared with {old.get('commit')} ({old.get('timestamp')}) --")
+    changed = [k for k in ('count', 'rate', 'mix', 'cardinality', 'concurrency', 'predict_batch')
+               if old.get('config', {}).get(k) != new['config'].get(k)]
+    if changed:
+        print(f"⚠️ Workload settings differ ({', '.join(changed)}); the numbers are not directly comparable.")
+    print(f"{'scenario':<9}{'metric':<22}{'before':>12}{'after':>12}{'change':>10}")
+    for name, r in new['scenarios'].items():
+        before = old.get('scenarios', {}).get(name)
+        if not before:
+            continue
+        for metric, a, b in [
+            ('throughput/s', before['throughputPerSecond'], r['throughputPerSecond']),
+            ('p50 ms', before['latencyMs']['p50'], r['latencyMs']['p50']),
+            ('p99 ms', before['latencyMs']['p99'], r['latencyMs']['p99']),
+            ('peak RSS MB', before['peakRssMb'], r['peakRssMb'])
+        ]:
+            if a is None or b is None:
+                continue
+            change = f"{(b - a) / a * 100:+.1f}%" if a else 'n/a'
+            print(f"{name:<9}{metric:<22}{a:>12.3f}{b:>12.3f}{change:>10}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Load generator and end-to-end benchmark for the IDS pipeline.")
+    parser.add_argument('scenarios', nargs='*', help=f"any of {', '.join(SCENARIOS)} (default: all)")
+    parser.add_argument('--count', type=int, default=20000, help="lines per scenario")
+    parser.add_argument('--rate', type=float, default=0, help="offered lines/s (0 = as fast as possible)")
+    parser.add_argument('--mix', type=float, default=0.2, help="share of suspicious lines")
+    parser.add_argument('--cardinality', type=int, default=1000,
+                        help="distinct source hosts / workstations in the synthetic lines")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--snort-file', help="replay this alert.fast instead of synthesizing")
+    parser.add_argument('--log-file', help="replay these event-log lines (one per line) instead of synthesizing")
+    parser.add_argument('--concurrency', type=int, default=8, help="client threads for the predict scenario")
+    parser.add_argument('--predict-batch', type=int, default=0, help="lines per /predict/batch call (0 = /predict)")
+    parser.add_argument('--predict-url', help="base URL of a running app.py / serve.py (default: start one here)")
+    parser.add_argument('--backend-delay-ms', type=float, default=0, help="artificial latency of the stub backend")
+    parser.add_argument('--output', default='benchmark_results.json')
+    parser.add_argument('--compare', help="earlier results file to compare against")
+    args = parser.parse_args()
+    args.scenarios = args.scenarios or SCENARIOS
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(sorted(unknown))}")
+
+    if args.snort_file:
+        snort_lines = read_lines(args.snort_file, args.count)
+    else:
+        snort_lines = synth_snort_lines(args.count, args.mix, args.cardinality, args.seed)
+    if args.log_file:
+        event_logs = read_lines(args.log_file, args.count)
+    else:
+        event_logs = synth_event_logs(args.count, args.mix, args.cardinality, args.seed)
+
+    results = {}
+    spawn = multiprocessing.get_context('spawn')
+    for name in args.scenarios:
+        print(f"⏱️  Running '{name}' ...")
+        with ProcessPoolExecutor(max_workers=1, mp_context=spawn) as pool:
+            results[name] = pool.submit(run_scenario, name, args, snort_lines, event_logs).result()
+
+    print(f"\n{'scenario':<9}{'lines':>9}{'lines/s':>12}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}{'RSS MB':>10}{'start MB':>10}")
+    for name, r in results.items():
+        print_scenario(name, r)
+
+    report = {
+        'commit': git_commit(),
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'config': vars(args),
+        'scenarios': results
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n✅ Results written to '{args.output}'")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            compare(json.load(f), report)
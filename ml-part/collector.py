@@ -0,0 +1,572 @@
+import argparse
+import asyncio
+import csv
+import glob
+import hashlib
+import json
+import os
+import re
+import signal
+import sys
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import joblib as jl
+
+from alertAggregator import AlertAggregator, SEVERITY_RANK
+from alertShipper import AlertShipper
+from fastScorer import FastScorer
+from instrumentation import counter, gauge, histogram, get_logger, start_metrics_server
+from logTailer import LogTailer
+
+# the Snort rule engine and alert.fast format live with the Snort integration
+SNORT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'snort-integration')
+sys.path.append(SNORT_DIR)
+from snortRules import RuleEngine, SNORT_PATTERN  # noqa: E402
+
+log = get_logger('collector')
+
+# ------------------------------------------------------------
+# Multi-Source Collector Daemon
+# ------------------------------------------------------------
+# `python collector.py --config collector.json` follows any number of log
+# sources from one process, replacing one snort_parser.py / logMonitor.py
+# per sensor:
+#
+#   tail (per file) -> parse -> [per-source queue] -> classify -> dedup -> ship
+#
+#  - every file is followed by a LogTailer (rotation, truncation and
+#    persisted offsets as in snort_parser.py), polled from a coroutine on
+#    one asyncio event loop; "path" may be a glob, re-scanned for new files
+#  - each line is parsed by the parser registered for the source type
+#    (register_parser adds new ones)
+#  - parsed events wait in a bounded queue per source: when a source's
+#    classifier falls behind, only that source's tailers stop reading
+#    (the backlog stays on disk and its offset is not committed)
+#  - a file's offset is committed only once every event read up to it
+#    has been classified and handed to the aggregator, so a crash
+#    re-reads queued events instead of skipping them
+#  - classification is shared: Snort sources go through a RuleEngine
+#    (one per rules file), text sources through the ML model, scored in
+#    batches on a worker thread so the event loop keeps tailing
+#  - one AlertAggregator and one AlertShipper serve every source
+#
+# Config (see collector.example.json):
+#   backend      url, batchUrl, apiKey, spillFile
+#   dedup        windowSeconds, maxKeys
+#   model        path (fast artifact dir or .joblib), highConfidence
+#   stateDir, metricsPort, queueSize, batchSize, pollInterval
+#   sources      list of {name, type, path, ...}; per source optionally
+#                classifier ("rules" | "model"), rules, sourceType,
+#                idPrefix, minSeverity, startAtEnd, queueSize and, for
+#                eventlog CSV exports, column / columnIndex
+#
+# Source types: snort_fast (alert.fast), syslog (RFC 3164 text files) and
+# eventlog (exported event logs, plain text or CSV). unified2 is a binary
+# record format the line tailer cannot follow; point Snort's alert_fast
+# output (or u2spewfoo) at a file and use snort_fast instead.
+
+DEFAULT_QUEUE_SIZE = 10000
+DEFAULT_BATCH_SIZE = 256
+DEFAULT_POLL_INTERVAL = 0.25
+READ_MAX_BYTES = 1024 * 1024
+RESCAN_INTERVAL_SECONDS = 30
+STATUS_INTERVAL_SECONDS = 10
+DEFAULT_RULES_FILE = os.path.join(SNORT_DIR, 'snort_rules.json')
+DEFAULT_MODEL = 'finalTrainedModel.fast'
+DEFAULT_HIGH_CONFIDENCE = 0.8
+DEFAULT_SOURCE_TYPES = {'snort_fast': 'Snort IDS', 'syslog': 'Syslog', 'eventlog': 'SystemMonitor_v1'}
+
+batch_seconds = {
+    name: histogram('collector_batch_seconds', 'Time per batch and stage in the collector', stage=name)
+    for name in ('parse', 'classify')
+}
+
+
+# ------------------------------------------------------------
+# Parsers
+# ------------------------------------------------------------
+# A parser factory takes the source config and returns parse(line),
+# which gives an event dict (logData plus optional msg/src/dst/proto and
+# gid/sid) or None for lines to skip. Each tailed file gets its own
+# parse(), so a parser may keep state between lines.
+PARSERS = {}
+
+UNSUPPORTED = {
+    'unified2': "unified2 is a binary format; enable Snort's alert_fast output "
+                "(or convert with u2spewfoo) and use type 'snort_fast'"
+}
+
+
+def register_parser(name):
+    def register(factory):
+        PARSERS[name] = factory
+        return factory
+    return register
+
+
+@register_parser('snort_fast')
+def snort_fast_parser(config):
+    def parse(line):
+        m = SNORT_PATTERN.search(line)
+        if not m:
+            return None
+        gid, sid, msg, proto, src, dst = m.groups()
+        return {
+            'logData': f"{msg} | {src} -> {dst}",
+            'msg': msg, 'src': src, 'dst': dst, 'proto': proto,
+            'gid': int(gid), 'sid': int(sid)
+        }
+    return parse
+
+
+SYSLOG_PATTERN = re.compile(r'^(?:<\d+>)?(\w{3}\s+\d+\s+[\d:]{8})\s+(\S+)\s+([^:\[\s]+)(?:\[\d+\])?:\s*(.*)$')
+
+
+@register_parser('syslog')
+def syslog_parser(config):
+    def parse(line):
+        m = SYSLOG_PATTERN.match(line)
+        if not m:
+            return None
+        _, hostname, program, message = m.groups()
+        text = f"{program}: {message}"
+        return {'logData': text, 'msg': text, 'src': hostname}
+    return parse
+
+
+MAX_RECORD_LINES = 1000
+
+
+@register_parser('eventlog')
+def eventlog_parser(config):
+    """
+    One event per line. For CSV exports set "column" to the field holding
+    the text (found in the header row) or "columnIndex" when the file is
+    picked up past its header. Event Viewer quotes multi-line messages,
+    so CSV lines are joined until every quote is closed and the record
+    is parsed once, when its last line arrives.
+    """
+    column = config.get('column')
+    index = config.get('columnIndex')
+    pending = []
+
+    def parse(line):
+        nonlocal index
+        if column is None and index is None:
+            text = line.strip()
+            return {'logData': text} if text else None
+
+        pending.append(line)
+        record = '\n'.join(pending)
+        # an odd number of quote characters means a quoted field is still open
+        # ("" escapes count twice, so they do not change the parity)
+        if record.count('"') % 2:
+            if len(pending) >= MAX_RECORD_LINES:
+                log.warning("%s: dropping an unterminated CSV record of %d lines", config['name'], len(pending))
+                pending.clear()
+            return None
+        pending.clear()
+        row = next(csv.reader([record]), [])
+        if column in row:
+            index = row.index(column)  # header row
+            return None
+        if index is None or len(row) <= index or not row[index].strip():
+            return None
+        return {'logData': row[index].strip()}
+    return parse
+
+
+# ------------------------------------------------------------
+# Shared classification stage
+# ------------------------------------------------------------
+class Classifier:
+    def __init__(self, model_path=DEFAULT_MODEL, high_confidence=DEFAULT_HIGH_CONFIDENCE):
+        self.model_path = model_path
+        self.high_confidence = high_confidence
+        self._engines = {}
+        self._model = None
+        # model scoring is CPU-bound; one thread keeps it off the event loop
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='classify')
+
+    def rules(self, path):
+        """RuleEngine for a rules file, shared by every source using it."""
+        if path not in self._engines:
+            self._engines[path] = RuleEngine.from_file(path)
+        return self._engines[path]
+
+    def model(self):
+        if self._model is None:
+            if os.path.isdir(self.model_path):
+                self._model = FastScorer.load(self.model_path, mmap=True)
+            else:
+                self._model = jl.load(self.model_path)
+            log.info("Model loaded from %s", self.model_path)
+        return self._model
+
+    def score(self, texts):
+        """Severities for a batch of log lines (runs on the executor)."""
+        model = self.model()
+        suspicious = list(model.classes_).index(1)
+        severities = []
+        for p in model.predict_proba(texts)[:, suspicious]:
+            if p >= self.high_confidence:
+                severities.append('High')
+            elif p >= 0.5:
+                severities.append('Medium')
+            else:
+                severities.append('Safe')
+        return severities
+
+
+# ------------------------------------------------------------
+# Sources
+# ------------------------------------------------------------
+class Checkpoints:
+    """Commits a file's offset once every event read before it is done."""
+
+    def __init__(self, tailer):
+        self.tailer = tailer
+        self.batches = deque()  # [events not done yet, tailer position], oldest first
+
+    def add(self, n_events):
+        batch = [n_events, self.tailer.position()]
+        self.batches.append(batch)
+        self.release()
+        return batch
+
+    def done(self, batch):
+        batch[0] -= 1
+        self.release()
+
+    def release(self):
+        position = None
+        while self.batches and self.batches[0][0] == 0:
+            position = self.batches.popleft()[1]
+        if position is not None:
+            self.tailer.commit(position)
+
+
+class Source:
+    def __init__(self, config, defaults):
+        self.name = config['name']
+        self.type = config['type']
+        self.path = config['path']
+        self.config = config
+        self.classifier = config.get('classifier', 'rules' if self.type == 'snort_fast' else 'model')
+        self.rules_file = config.get('rules', DEFAULT_RULES_FILE)
+        self.source_type = config.get('sourceType', DEFAULT_SOURCE_TYPES.get(self.type, self.name))
+        self.id_prefix = config.get('idPrefix', self.name.upper())
+        self.min_rank = SEVERITY_RANK.get(config.get('minSeverity', 'Safe'), 0)
+        self.start_at_end = config.get('startAtEnd', True)
+        self.queue_size = config.get('queueSize', defaults['queueSize'])
+        self.queue = None  # created on the event loop
+
+        self.tasks = {}    # path -> tail task
+        self.tailers = {}  # path -> LogTailer
+        self.matched = counter('collector_lines_total', 'Lines read per source', source=self.name, result='matched')
+        self.unmatched = counter('collector_lines_total', 'Lines read per source', source=self.name, result='unmatched')
+        self.filtered = counter('collector_events_filtered_total', 'Events below the source minSeverity',
+                                source=self.name)
+        self.blocked = 0   # times a tailer waited on a full queue
+
+    def parser(self):
+        return PARSERS[self.type](self.config)
+
+    def files(self):
+        if is_glob(self.path):
+            return sorted(glob.glob(self.path))
+        return [self.path]
+
+    def stats(self):
+        tailers = [t.stats() for t in self.tailers.values()]
+        return {
+            'files': len(tailers),
+            'lines': sum(t['lines'] for t in tailers),
+            'linesPerSecond': round(sum(t['linesPerSecond'] for t in tailers), 1),
+            'lagBytes': sum(t['lagBytes'] for t in tailers),
+            'unmatched': self.unmatched.value,
+            'filtered': self.filtered.value,
+            'queueDepth': self.queue.qsize() if self.queue else 0,
+            'queueBlocked': self.blocked
+        }
+
+
+def is_glob(path):
+    return any(c in path for c in '*?[')
+
+
+def load_config(path):
+    with open(path, encoding='utf-8') as f:
+        config = json.load(f)
+    sources = config.get('sources') or []
+    if not sources:
+        raise ValueError(f"No sources configured in '{path}'")
+    names = set()
+    for i, source in enumerate(sources):
+        for key in ('name', 'type', 'path'):
+            if key not in source:
+                raise ValueError(f"Source #{i + 1} is missing '{key}'")
+        if source['name'] in names:
+            raise ValueError(f"Duplicate source name '{source['name']}'")
+        names.add(source['name'])
+        if source['type'] in UNSUPPORTED:
+            raise ValueError(f"Source '{source['name']}': {UNSUPPORTED[source['type']]}")
+        if source['type'] not in PARSERS:
+            raise ValueError(f"Source '{source['name']}': unknown type '{source['type']}' "
+                             f"(available: {', '.join(sorted(PARSERS))})")
+        if source.get('classifier', 'rules') not in ('rules', 'model'):
+            raise ValueError(f"Source '{source['name']}': classifier must be 'rules' or 'model'")
+    return config
+
+
+# ------------------------------------------------------------
+# Collector
+# ------------------------------------------------------------
+class Collector:
+    def __init__(self, config):
+        backend = config.get('backend', {})
+        dedup = config.get('dedup', {})
+        model = config.get('model', {})
+        self.state_dir = config.get('stateDir', 'collector_state')
+        self.metrics_port = config.get('metricsPort', 0)
+        self.batch_size = config.get('batchSize', DEFAULT_BATCH_SIZE)
+        self.poll_interval = config.get('pollInterval', DEFAULT_POLL_INTERVAL)
+        defaults = {'queueSize': config.get('queueSize', DEFAULT_QUEUE_SIZE)}
+        self.sources = [Source(s, defaults) for s in config['sources']]
+
+        headers = {'x-api-key': backend['apiKey']} if backend.get('apiKey') else None
+        self.shipper = AlertShipper(
+            url=backend.get('url', 'http://127.0.0.1:3001/api/log-alert'),
+            batch_url=backend.get('batchUrl', 'http://127.0.0.1:3001/api/log-alert/batch'),
+            headers=headers,
+            spill_file=backend.get('spillFile', 'collector_spill.jsonl')
+        )
+        self.aggregator = AlertAggregator(self.shipper.submit, window_seconds=dedup.get('windowSeconds', 10),
+                                          max_keys=dedup.get('maxKeys', 10000))
+        self.classifier = Classifier(model.get('path', DEFAULT_MODEL),
+                                     model.get('highConfidence', DEFAULT_HIGH_CONFIDENCE))
+        self.stopping = None
+        self._closed = False
+
+    def state_file(self, source, path):
+        digest = hashlib.sha1(os.path.abspath(path).encode('utf-8')).hexdigest()[:8]
+        return os.path.join(self.state_dir, f"{source.name}-{digest}_state.json")
+
+    async def _sleep(self, seconds):
+        """Sleep, waking early when the collector is stopped."""
+        try:
+            await asyncio.wait_for(self.stopping.wait(), seconds)
+        except asyncio.TimeoutError:
+            pass
+
+    # --------------------------------------------------------
+    # Tail + parse
+    # --------------------------------------------------------
+    async def discover(self, source):
+        """Start a tail task for every file matching the source path."""
+        while not self.stopping.is_set():
+            for path in source.files():
+                if path not in source.tasks:
+                    log.info("%s: following %s", source.name, path)
+                    source.tasks[path] = asyncio.create_task(self.tail(source, path))
+            if not is_glob(source.path):
+                return
+            await self._sleep(RESCAN_INTERVAL_SECONDS)
+
+    async def tail(self, source, path):
+        tailer = LogTailer(path, state_file=self.state_file(source, path), start_at_end=source.start_at_end,
+                           poll_interval=self.poll_interval, use_notify=False)
+        source.tailers[path] = tailer
+        queue = source.queue
+        parse = source.parser()  # per file: parsers may hold a partial record
+        checkpoints = Checkpoints(tailer)
+        try:
+            while not self.stopping.is_set():
+                lines = tailer.read_available(max_bytes=READ_MAX_BYTES)
+                if not lines:
+                    await self._sleep(self.poll_interval)
+                    continue
+
+                start = time.perf_counter()
+                events = [event for event in map(parse, lines) if event is not None]
+                batch_seconds['parse'].observe(time.perf_counter() - start)
+                source.matched.inc(len(events))
+                source.unmatched.inc(len(lines) - len(events))
+
+                batch = checkpoints.add(len(events))
+                for event in events:
+                    item = (event, checkpoints, batch)
+                    try:
+                        queue.put_nowait(item)
+                    except asyncio.QueueFull:
+                        # backpressure: stop reading this source until it drains
+                        source.blocked += 1
+                        await queue.put(item)
+                # let the other sources' tasks run between large batches
+                await asyncio.sleep(0)
+        finally:
+            tailer.close()
+
+    # --------------------------------------------------------
+    # Classify + dedup/ship
+    # --------------------------------------------------------
+    async def consume(self, source):
+        loop = asyncio.get_running_loop()
+        queue = source.queue
+        while True:
+            items = [await queue.get()]
+            while len(items) < self.batch_size:
+                try:
+                    items.append(queue.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+            events = [event for event, _, _ in items]
+            try:
+                start = time.perf_counter()
+                if source.classifier == 'rules':
+                    engine = self.classifier.rules(source.rules_file)
+                    severities = [engine.classify(e.get('msg', e['logData']), e.get('sid'), e.get('gid', 1))
+                                  for e in events]
+                else:
+                    severities = await loop.run_in_executor(
+                        self.classifier.executor, self.classifier.score, [e['logData'] for e in events])
+                batch_seconds['classify'].observe(time.perf_counter() - start)
+                for event, severity in zip(events, severities):
+                    self.emit(source, event, severity)
+            except Exception:
+                log.exception("%s: failed to classify a batch of %d events", source.name, len(events))
+            finally:
+                for _, checkpoints, batch in items:
+                    checkpoints.done(batch)
+                    queue.task_done()
+
+    def emit(self, source, event, severity):
+        if SEVERITY_RANK.get(severity, 0) < source.min_rank:
+            source.filtered.inc()
+            return
+        alert = {
+            'alertId': f"{source.id_prefix}-{uuid.uuid4().hex[:12]}",
+            'sourceType': source.source_type,
+            'severity': severity,
+            'logData': event['logData'],
+            # aggregation key, stripped before the alert is shipped
+            'msg': event.get('msg'),
+            'src': event.get('src', ''),
+            'dst': event.get('dst', ''),
+            'proto': event.get('proto', '')
+        }
+        self.aggregator.add(alert)
+
+    # --------------------------------------------------------
+    # Lifecycle
+    # --------------------------------------------------------
+    async def report(self):
+        while not self.stopping.is_set():
+            await self._sleep(STATUS_INTERVAL_SECONDS)
+            for source in self.sources:
+                s = source.stats()
+                log.info("%s: %d files, %s lines/s, lag %d bytes, queue %d/%d, %d unmatched, %d filtered",
+                         source.name, s['files'], s['linesPerSecond'], s['lagBytes'], s['queueDepth'],
+                         source.queue_size, s['unmatched'], s['filtered'])
+
+    def register_metrics(self):
+        def per_source(key):
+            return lambda: {(('source', s.name),): s.stats()[key] for s in self.sources}
+        gauge('collector_queue_depth', 'Events waiting for classification', per_source('queueDepth'))
+        gauge('collector_lag_bytes', 'Unread bytes across the source files', per_source('lagBytes'))
+        gauge('collector_files', 'Files followed', per_source('files'))
+        gauge('collector_shipper_queue_depth', 'Alerts waiting to be shipped',
+              lambda: self.shipper.stats()['queueDepth'])
+        gauge('collector_dedup_open_windows', 'Open aggregation windows',
+              lambda: self.aggregator.stats()['openWindows'])
+        if self.metrics_port:
+            start_metrics_server(self.metrics_port)
+            log.info("Metrics on http://127.0.0.1:%d/metrics", self.metrics_port)
+
+    async def run(self):
+        self.stopping = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, self.stopping.set)
+            except (NotImplementedError, AttributeError, ValueError):
+                pass  # Windows: Ctrl+C raises KeyboardInterrupt instead
+        os.makedirs(self.state_dir, exist_ok=True)
+        for source in self.sources:
+            source.queue = asyncio.Queue(maxsize=source.queue_size)
+        self.register_metrics()
+
+        consumers = [asyncio.create_task(self.consume(s)) for s in self.sources]
+        discoverers = [asyncio.create_task(self.discover(s)) for s in self.sources]
+        reporter = asyncio.create_task(self.report())
+        print(f"🟢 Collecting from {len(self.sources)} sources: "
+              f"{', '.join(f'{s.name} ({s.type})' for s in self.sources)}")
+
+        # also reached when the task is cancelled, which is how Ctrl+C
+        # arrives where add_signal_handler is unavailable (Windows)
+        try:
+            await self.stopping.wait()
+        finally:
+            try:
+                await self.drain(consumers, discoverers, reporter)
+            finally:
+                self.close()
+
+    async def drain(self, consumers, discoverers, reporter):
+        """Stop tailing and classify everything already queued."""
+        self.stopping.set()
+        print("🛑 Stopping: finishing queued events...")
+        await asyncio.gather(*discoverers, return_exceptions=True)
+        await asyncio.gather(*(t for s in self.sources for t in s.tasks.values()), return_exceptions=True)
+        for source in self.sources:
+            await source.queue.join()
+            # the tailers closed before their last events were done
+            for tailer in source.tailers.values():
+                tailer.save_state()
+        for task in consumers + [reporter]:
+            task.cancel()
+        await asyncio.gather(*consumers, reporter, return_exceptions=True)
+
+    def close(self):
+        """Close open dedup windows and ship (or spill) queued alerts; safe to call twice."""
+        if self._closed:
+            return
+        self._closed = True
+        self.classifier.executor.shutdown()
+        self.aggregator.close()
+        self.shipper.close()
+        for source in self.sources:
+            print(f"   {source.name}: {source.stats()}")
+        print(f"   Dedup stats: {self.aggregator.stats()}")
+        print(f"   Shipping stats: {self.shipper.stats()}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Collect alerts from many log sources in one process.")
+    parser.add_argument('--config', default='collector.json')
+    parser.add_argument('--check', action='store_true', help="validate the config, list the matched files and exit")
+    args = parser.parse_args()
+
+    try:
+        config = load_config(args.config)
+    except (OSError, ValueError) as e:
+        print(f"❌ Invalid collector config: {e}")
+        sys.exit(1)
+
+    if args.check:
+        for source_config in config['sources']:
+            files = Source(source_config, {'queueSize': DEFAULT_QUEUE_SIZE}).files()
+            print(f"{source_config['name']} ({source_config['type']}): {', '.join(files) or 'no files yet'}")
+        sys.exit(0)
+
+    collector = Collector(config)
+    try:
+        asyncio.run(collector.run())
+    except KeyboardInterrupt:
+        # run() normally drains and closes on the way out; this covers an
+        # interrupt that arrived before it got there
+        collector.close()
+        print("\n🛑 Collector stopped.")
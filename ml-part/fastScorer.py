@@ -0,0 +1,271 @@
+import json
+import os
+import re
+import shutil
+import sys
+import tempfile
+
+import numpy as np
+from scipy.special import expit
+
+# ------------------------------------------------------------
+# Compact Inference Artifact
+# ------------------------------------------------------------
+# The trained pipeline is TfidfVectorizer + binary LogisticRegression.
+# At inference time that is a vocabulary lookup, a sparse dot product and
+# a sigmoid, so the artifact only keeps what those steps need:
+#
+#   <dir>/meta.json      vocabulary (terms in column order), tokenizer
+#                        settings, classes, model version
+#   <dir>/idf.npy        idf weight per column
+#   <dir>/coef.npy       logistic regression coefficients per column
+#   <dir>/intercept.npy  logistic regression intercept
+#
+# The .npy files are plain arrays so they can be memory-mapped.
+ARTIFACT_FORMAT = 'tfidf-logreg-v1'
+META_FILE = 'meta.json'
+
+
+def export_artifact(pipeline, path, model_version='v1.1-logistic-regression'):
+    """Write the fast-scoring artifact for a fitted TF-IDF + LR pipeline."""
+    vectorizer = pipeline.steps[0][1]
+    classifier = pipeline.steps[-1][1]
+
+    if len(pipeline.steps) != 2:
+        raise ValueError("Expected a two-step vectorizer + classifier pipeline.")
+    if vectorizer.analyzer != 'word' or vectorizer.tokenizer is not None or vectorizer.preprocessor is not None:
+        raise ValueError("Only the built-in word analyzer is supported.")
+    if vectorizer.strip_accents is not None:
+        raise ValueError("strip_accents is not supported.")
+    if vectorizer.norm not in ('l2', None):
+        raise ValueError(f"Unsupported norm: {vectorizer.norm!r}")
+    if len(classifier.classes_) != 2:
+        raise ValueError("Only binary classifiers are supported.")
+
+    stop_words = vectorizer.get_stop_words()
+    vocabulary = [None] * len(vectorizer.vocabulary_)
+    for term, column in vectorizer.vocabulary_.items():
+        vocabulary[column] = term
+
+    idf = vectorizer.idf_ if vectorizer.use_idf else np.ones(len(vocabulary))
+
+    arrays = {
+        'idf.npy': np.ascontiguousarray(idf, dtype=np.float64),
+        'coef.npy': np.ascontiguousarray(classifier.coef_[0], dtype=np.float64),
+        'intercept.npy': np.asarray(classifier.intercept_, dtype=np.float64)
+    }
+
+    meta = {
+        'format': ARTIFACT_FORMAT,
+        'modelVersion': model_version,
+        'classes': [int(c) for c in classifier.classes_],
+        'tokenPattern': vectorizer.token_pattern,
+        'lowercase': bool(vectorizer.lowercase),
+        'ngramRange': list(vectorizer.ngram_range),
+        'stopWords': sorted(stop_words) if stop_words else [],
+        'binary': bool(vectorizer.binary),
+        'sublinearTf': bool(vectorizer.sublinear_tf),
+        'norm': vectorizer.norm,
+        'vocabulary': vocabulary
+    }
+    # Every file is written to a staging directory and then renamed into
+    # place, so a running server that memory-maps the old arrays keeps its
+    # (now unlinked) inodes intact instead of seeing them rewritten.
+    # meta.json is moved last so its mtime marks a complete artifact.
+    os.makedirs(path, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix='.export-', dir=path)
+    try:
+        for name, array in arrays.items():
+            np.save(os.path.join(staging, name), array)
+        with open(os.path.join(staging, META_FILE), 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        for name in list(arrays) + [META_FILE]:
+            os.replace(os.path.join(staging, name), os.path.join(path, name))
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+
+
+# ------------------------------------------------------------
+# Lean Scorer
+# ------------------------------------------------------------
+class FastScorer:
+    """
+    NumPy re-implementation of pipeline.predict_proba for the exported
+    artifact. Row reductions are accumulated term by term in column order,
+    the same order scikit-learn/scipy use, so the probabilities are
+    bit-identical to the original pipeline.
+    """
+
+    def __init__(self, meta, idf, coef, intercept):
+        if meta.get('format') != ARTIFACT_FORMAT:
+            raise ValueError(f"Unsupported artifact format: {meta.get('format')!r}")
+
+        self.model_version = meta['modelVersion']
+        self.classes_ = np.asarray(meta['classes'])
+        self.vocabulary = {term: column for column, term in enumerate(meta['vocabulary'])}
+        self.token_pattern = re.compile(meta['tokenPattern'])
+        self.lowercase = meta['lowercase']
+        self.ngram_range = tuple(meta['ngramRange'])
+        self.stop_words = frozenset(meta['stopWords'])
+        self.binary = meta['binary']
+        self.sublinear_tf = meta['sublinearTf']
+        self.norm = meta['norm']
+        self.idf = idf
+        self.coef = coef
+        self.intercept = float(intercept[0])
+
+    @classmethod
+    def load(cls, path, mmap=False):
+        """Load an artifact directory; mmap=True memory-maps the arrays."""
+        with open(os.path.join(path, META_FILE), encoding='utf-8') as f:
+            meta = json.load(f)
+        mode = 'r' if mmap else None
+        idf = np.load(os.path.join(path, 'idf.npy'), mmap_mode=mode)
+        coef = np.load(os.path.join(path, 'coef.npy'), mmap_mode=mode)
+        intercept = np.load(os.path.join(path, 'intercept.npy'))
+        return cls(meta, idf, coef, intercept)
+
+    def _terms(self, text):
+        if self.lowercase:
+            text = text.lower()
+        tokens = self.token_pattern.findall(text)
+        if self.stop_words:
+            tokens = [t for t in tokens if t not in self.stop_words]
+        low, high = self.ngram_range
+        if high == 1:
+            return tokens
+        terms = list(tokens) if low == 1 else []
+        for n in range(max(low, 2), min(high, len(tokens)) + 1):
+            terms.extend(' '.join(tokens[i:i + n]) for i in range(len(tokens) - n + 1))
+        return terms
+
+    def _row_columns(self, text):
+        counts = {}
+        vocabulary = self.vocabulary
+        for term in self._terms(text):
+            column = vocabulary.get(term)
+            if column is not None:
+                counts[column] = counts.get(column, 0) + 1
+        columns = sorted(counts)
+        return columns, [counts[c] for c in columns]
+
+    def transform(self, logs):
+        """
+        TF-IDF step: returns (columns, weights), two (n_rows, width) arrays
+        holding each row's vocabulary columns and normalized weights.
+        """
+        n_rows = len(logs)
+        flat_columns = []
+        flat_counts = []
+        lengths = np.empty(n_rows, dtype=np.intp)
+        for i, text in enumerate(logs):
+            cols, counts = self._row_columns(text)
+            flat_columns.extend(cols)
+            flat_counts.extend(counts)
+            lengths[i] = len(cols)
+        width = int(lengths.max()) if n_rows else 0
+
+        # rows padded to a dense (n_rows, width) block; padding has weight 0
+        # so it does not change any sum
+        rows = np.repeat(np.arange(n_rows), lengths)
+        starts = np.cumsum(lengths) - lengths
+        positions = np.arange(len(flat_columns)) - np.repeat(starts, lengths)
+        columns = np.zeros((n_rows, width), dtype=np.intp)
+        tf = np.zeros((n_rows, width), dtype=np.float64)
+        columns[rows, positions] = flat_columns
+        tf[rows, positions] = flat_counts
+
+        if self.binary:
+            np.minimum(tf, 1.0, out=tf)
+        if self.sublinear_tf:
+            present = tf > 0
+            tf[present] = np.log(tf[present]) + 1.0
+        weights = tf * self.idf[columns]
+
+        if self.norm == 'l2':
+            squares = weights * weights
+            norms = np.zeros(n_rows)
+            for j in range(width):
+                norms += squares[:, j]
+            nonzero = norms != 0.0
+            norms[nonzero] = np.sqrt(norms[nonzero])
+            norms[~nonzero] = 1.0
+            weights /= norms[:, None]
+        return columns, weights
+
+    def decision_function_features(self, features):
+        """Linear step on the output of transform()."""
+        columns, weights = features
+        products = weights * self.coef[columns]
+        scores = np.zeros(products.shape[0])
+        for j in range(products.shape[1]):
+            scores += products[:, j]
+        return scores + self.intercept
+
+    def predict_proba_features(self, features):
+        prob = expit(self.decision_function_features(features))
+        return np.stack([1 - prob, prob], axis=1)
+
+    def decision_function(self, logs):
+        return self.decision_function_features(self.transform(logs))
+
+    def predict_proba(self, logs):
+        return self.predict_proba_features(self.transform(logs))
+
+    def predict(self, logs):
+        return self.classes_[(self.decision_function(logs) > 0).astype(int)]
+
+
+# ------------------------------------------------------------
+# Parity Check
+# ------------------------------------------------------------
+def check_parity(pipeline, scorer, logs):
+    """
+    Compare scorer against pipeline.predict_proba on logs. Returns the
+    number of rows whose probabilities are not bit-identical.
+    """
+    expected = pipeline.predict_proba(list(logs))
+    actual = scorer.predict_proba(list(logs))
+    return int(np.count_nonzero(np.any(expected != actual, axis=1)))
+
+
+SAMPLE_LOGS = [
+    "Credential Manager credentials were read.",
+    "User logon successful at workstation. Authentication type: Kerberos",
+    "Application starting up normally: Chrome.exe, Process ID: 1234",
+    "DHCP lease renewed successfully for IP: 192.168.1.100",
+    "Failed logon attempt from unknown user. Source IP: 203.0.113.12",
+    "New executable created in temp directory. Filename: hidden_tool.exe",
+    "Abnormal network connection to port 4444. Destination: 10.0.0.5",
+    "System DLL injection detected in critical process. Process: lsass.exe",
+    "Special privileges assigned to new logon. Logon Logon Logon",
+    "Security Group Management: a member was added to a security-enabled local group",
+    "",
+    "the and of"
+]
+
+
+if __name__ == '__main__':
+    # python fastScorer.py [model.joblib] [artifact_dir]
+    # Exports the artifact for an existing joblib pipeline and verifies
+    # that it reproduces pipeline.predict_proba exactly. Without
+    # artifact_dir the export goes to a temporary directory, so a plain
+    # parity check never touches the committed (and possibly served)
+    # finalTrainedModel.fast.
+    import joblib as jl
+
+    model_file = sys.argv[1] if len(sys.argv) > 1 else 'finalTrainedModel.joblib'
+    artifact_dir = sys.argv[2] if len(sys.argv) > 2 else None
+
+    pipeline = jl.load(model_file)
+    with tempfile.TemporaryDirectory() as scratch:
+        target = artifact_dir or os.path.join(scratch, 'model.fast')
+        export_artifact(pipeline, target)
+        scorer = FastScorer.load(target)
+        mismatches = check_parity(pipeline, scorer, SAMPLE_LOGS)
+
+    if mismatches:
+        print(f"❌ Parity check failed: {mismatches}/{len(SAMPLE_LOGS)} rows differ from the pipeline.")
+        sys.exit(1)
+    where = f"to '{artifact_dir}'" if artifact_dir else "(temporary directory, nothing written)"
+    print(f"✅ Exported '{model_file}' {where} ({len(scorer.vocabulary)} terms), parity OK.")
@@ -0,0 +1,321 @@
+import bisect
+import cProfile
+import io
+import logging
+import os
+import pstats
+import random
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# ------------------------------------------------------------
+# Hot-Path Instrumentation
+# ------------------------------------------------------------
+# Shared by app.py and the collectors:
+#
+#  - counters, gauges and fixed-bucket histograms in one registry,
+#    rendered in the Prometheus text format by render_metrics()
+#    (app.py serves it on /metrics; collectors can call
+#    start_metrics_server(port))
+#  - stage(name) times a pipeline stage (parse, classify, vectorize,
+#    predict, ship) into the ids_stage_seconds histogram; per-line loops
+#    fetch the histogram once with stage_histogram(name) and time with
+#    perf_counter() themselves
+#  - SampledProfiler runs cProfile on a small random fraction of calls
+#  - get_logger() returns a leveled logger whose repeated messages are
+#    rate-limited, replacing the old per-line print() calls
+#
+# Recording a value is a bisect plus two additions under a lock, cheap
+# enough for every log line. Metrics are per process: behind serve.py
+# each worker reports its own.
+
+METRIC_PREFIX = 'ids_'
+
+# seconds; covers ~10 µs regex matches up to multi-second backend calls
+DEFAULT_BUCKETS = (
+    0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025,
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0
+)
+
+
+def _label_text(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{k}="{v}"' for k, v in labels) + '}'
+
+
+class Counter:
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += value
+
+    def snapshot(self):
+        with self._lock:
+            return list(self.counts), self.sum
+
+    def quantile(self, q):
+        """Approximate quantile (upper bound of the bucket holding it)."""
+        counts, _ = self.snapshot()
+        total = sum(counts)
+        if not total:
+            return 0.0
+        rank = q * total
+        seen = 0
+        for upper, count in zip(self.buckets + (float('inf'),), counts):
+            seen += count
+            if seen >= rank:
+                return upper
+        return float('inf')
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}  # name -> (type, help, {label tuple: metric})
+        self._gauges = {}   # name -> (help, callable returning {label tuple: value} or a number)
+        self._lock = threading.Lock()
+
+    def _get(self, kind, name, help_text, labels, factory):
+        key = tuple(sorted(labels.items())) if labels else ()
+        family = self._metrics.get(name)
+        if family is None or key not in family[2]:
+            with self._lock:
+                family = self._metrics.setdefault(name, (kind, help_text, {}))
+                family[2].setdefault(key, factory())
+        return family[2][key]
+
+    def counter(self, name, help_text='', **labels):
+        return self._get('counter', METRIC_PREFIX + name, help_text, labels, Counter)
+
+    def histogram(self, name, help_text='', buckets=DEFAULT_BUCKETS, **labels):
+        return self._get('histogram', METRIC_PREFIX + name, help_text, labels, lambda: Histogram(buckets))
+
+    def gauge(self, name, help_text, fn):
+        """Register a gauge whose value is read from fn() at scrape time."""
+        with self._lock:
+            self._gauges[METRIC_PREFIX + name] = (help_text, fn)
+
+    def render(self):
+        lines = []
+        for name, (kind, help_text, family) in sorted(self._metrics.items()):
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            for labels, metric in sorted(family.items()):
+                if kind == 'counter':
+                    lines.append(f'{name}{_label_text(labels)} {metric.value}')
+                    continue
+                counts, total = metric.snapshot()
+                cumulative = 0
+                for upper, count in zip(metric.buckets + (float('inf'),), counts):
+                    cumulative += count
+                    le = '+Inf' if upper == float('inf') else repr(upper)
+                    lines.append(f'{name}_bucket{_label_text(labels + (("le", le),))} {cumulative}')
+                lines.append(f'{name}_sum{_label_text(labels)} {total}')
+                lines.append(f'{name}_count{_label_text(labels)} {cumulative}')
+        for name, (help_text, fn) in sorted(self._gauges.items()):
+            try:
+                value = fn()
+            except Exception:
+                continue
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} gauge')
+            if isinstance(value, dict):
+                for labels, v in sorted(value.items()):
+                    lines.append(f'{name}{_label_text(labels)} {v}')
+            else:
+                lines.append(f'{name} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+
+def counter(name, help_text='', **labels):
+    return REGISTRY.counter(name, help_text, **labels)
+
+
+def histogram(name, help_text='', **labels):
+    return REGISTRY.histogram(name, help_text, **labels)
+
+
+def gauge(name, help_text, fn):
+    REGISTRY.gauge(name, help_text, fn)
+
+
+def render_metrics():
+    return REGISTRY.render()
+
+
+_stage_metrics = {}
+
+
+def stage_histogram(name):
+    """The ids_stage_seconds{stage=name} histogram, looked up once per name."""
+    metric = _stage_metrics.get(name)
+    if metric is None:
+        metric = _stage_metrics[name] = REGISTRY.histogram('stage_seconds', 'Time spent per pipeline stage',
+                                                           stage=name)
+    return metric
+
+
+class stage:
+    """Time one pipeline stage into ids_stage_seconds{stage=name} (per request or batch)."""
+    __slots__ = ('metric', 'start')
+
+    def __init__(self, name):
+        self.metric = stage_histogram(name)
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.metric.observe(time.perf_counter() - self.start)
+        return False
+
+
+# ------------------------------------------------------------
+# Metrics endpoint for processes without a web app
+# ------------------------------------------------------------
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = render_metrics().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(port, host='127.0.0.1'):
+    """Serve /metrics from a background thread (used by the collectors)."""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='metrics-server', daemon=True).start()
+    return server
+
+
+# ------------------------------------------------------------
+# Sampling Profiler
+# ------------------------------------------------------------
+class SampledProfiler:
+    """
+    Profiles a random fraction (sample_rate) of the wrapped calls with
+    cProfile and accumulates the stats; report() returns the top entries.
+    sample_rate=0 disables it at the cost of one comparison per call.
+    """
+
+    def __init__(self, sample_rate=0.0, top=25):
+        self.sample_rate = sample_rate
+        self.top = top
+        self.samples = 0
+        self._stats = None
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def maybe_profile(self):
+        if not self.sample_rate or random.random() >= self.sample_rate or not self._lock.acquire(blocking=False):
+            # only one profiled call at a time; cProfile is per thread anyway
+            yield
+            return
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+            yield
+        finally:
+            profiler.disable()
+            if self._stats is None:
+                self._stats = pstats.Stats(profiler)
+            else:
+                self._stats.add(profiler)
+            self.samples += 1
+            self._lock.release()
+
+    def report(self):
+        if self._stats is None:
+            return f"No samples collected (sample rate {self.sample_rate})."
+        out = io.StringIO()
+        with self._lock:
+            self._stats.stream = out
+            out.write(f"{self.samples} sampled calls\n")
+            self._stats.sort_stats('cumulative').print_stats(self.top)
+        return out.getvalue()
+
+
+# ------------------------------------------------------------
+# Leveled, rate-limited logging
+# ------------------------------------------------------------
+class RateLimitFilter(logging.Filter):
+    """
+    Lets at most `burst` records with the same message template through
+    per `interval` seconds; the rest are counted and reported in the next
+    record that passes.
+    """
+
+    def __init__(self, burst=10, interval=10.0):
+        super().__init__()
+        self.burst = burst
+        self.interval = interval
+        self._windows = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        key = (record.name, record.levelno, record.msg)
+        now = time.monotonic()
+        with self._lock:
+            start, passed, suppressed = self._windows.get(key, (now, 0, 0))
+            if now - start >= self.interval:
+                start, passed = now, 0
+            if passed >= self.burst:
+                self._windows[key] = (start, passed, suppressed + 1)
+                return False
+            self._windows[key] = (start, passed + 1, 0)
+        if suppressed:
+            record.msg = f"{record.msg} [{suppressed} similar messages suppressed]"
+        return True
+
+
+_configured = False
+
+
+def get_logger(name):
+    """Logger with level from LOG_LEVEL (default INFO) and rate limiting."""
+    global _configured
+    if not _configured:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)-7s %(name)s: %(message)s'))
+        handler.addFilter(RateLimitFilter(
+            burst=int(os.environ.get('LOG_RATE_BURST', 10)),
+            interval=float(os.environ.get('LOG_RATE_INTERVAL', 10))
+        ))
+        root = logging.getLogger('ids')
+        root.addHandler(handler)
+        root.setLevel(os.environ.get('LOG_LEVEL', 'INFO').upper())
+        root.propagate = False
+        _configured = True
+    return logging.getLogger(f'ids.{name}')
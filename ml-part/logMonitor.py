@@ -1,6 +1,5 @@
 import pandas as pd
 import joblib # Changed from jl alias for clarity
-import requests
 from datetime import datetime
 import time
 import warnings
@@ -8,14 +7,21 @@ import sys
 import os
 import random
 from itertools import cycle
+from alertShipper import AlertShipper
+from alertAggregator import AlertAggregator
+from instrumentation import get_logger
+
+log = get_logger('monitor')
 
 # Suppress warnings
 warnings.filterwarnings("ignore")
 
 # --- Configuration ---
 BACKEND_API_URL = 'http://127.0.0.1:3001/api/log-alert'
+BACKEND_BATCH_API_URL = 'http://127.0.0.1:3001/api/log-alert/batch'
 LOG_INTERVAL_SECONDS = 5
 LOG_SOURCE_TYPE = "SystemMonitor_v1"
+DEDUP_WINDOW_SECONDS = 60
 
 # --- Simulated Logs ---
 SAFE_LOGS = [
@@ -63,6 +69,11 @@ def generate_simulated_log():
 # --- Log Monitoring Loop ---
 def start_log_monitoring():
     print(f"🚀 Starting Real-Time Log Monitoring. Interval: {LOG_INTERVAL_SECONDS} seconds.")
+    # Alerts are queued and shipped in the background, so a slow backend
+    # never delays log generation
+    shipper = AlertShipper(url=BACKEND_API_URL, batch_url=BACKEND_BATCH_API_URL, spill_file='logMonitor_spill.jsonl')
+    # the first of repeated log lines is shipped at once, the rest as one summary with a count
+    aggregator = AlertAggregator(shipper.submit, window_seconds=DEDUP_WINDOW_SECONDS)
     try:
         while True:
             # 1. Generate a new log entry
@@ -71,32 +82,20 @@ def start_log_monitoring():
             alert_id = log_data_payload['alertId']
             log_text = log_data_payload['logData']
 
-            print("-" * 50)
-            print(f"[{datetime.now().strftime('%H:%M:%S')}] Generating Log: {alert_id}")
-            print(f"   Log Text: {log_text}")
+            log.info("Generating log %s: %s", alert_id, log_text)
 
-            # 2. Send the log to the Node.js backend API
-            try:
-                response = requests.post(BACKEND_API_URL, json=log_data_payload, timeout=10)
-                response.raise_for_status()
-                
-                result = response.json()
-                status = "SUSPICIOUS 🔴" if result.get('isSuspicious') else "Safe 🟢"
-                
-                print(f"   Response Status: {response.status_code}")
-                print(f"   ML Prediction: {status} (Conf: {result.get('confidencePct')}%)")
-                print(f"   Blockchain Tx: {result.get('txHash', 'N/A')[:10]}...")
-                
-            except requests.exceptions.RequestException as req_e:
-                print(f"   XXX ERROR sending alert to backend: {req_e}")
-            except Exception as e:
-                print(f"   XXX UNEXPECTED ERROR during API call: {e}")
+            # 2. Queue the log for the Node.js backend API
+            aggregator.add(log_data_payload)
 
             # 3. Wait for the next interval
             time.sleep(LOG_INTERVAL_SECONDS)
 
     except KeyboardInterrupt:
         print("\n\n🛑 Log monitoring stopped by user.")
+        aggregator.close()
+        shipper.close()
+        print(f"   Dedup stats: {aggregator.stats()}")
+        print(f"   Shipping stats: {shipper.stats()}")
         sys.exit(0)
 
 if __name__ == "__main__":
@@ -0,0 +1,287 @@
+import json
+import os
+import threading
+import time
+
+from instrumentation import get_logger
+
+log = get_logger('tailer')
+
+# watchdog is optional: with it the tailer wakes up on file-system events,
+# without it (or if the observer cannot start) it falls back to polling
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+except ImportError:
+    Observer = None
+    FileSystemEventHandler = object
+
+# ------------------------------------------------------------
+# Log File Tailer
+# ------------------------------------------------------------
+# Follows a growing text log (Snort alert.fast, syslog, ...) the way
+# `tail -F` does, but reads in large chunks and splits lines itself so it
+# can keep up with tens of thousands of lines per second.
+#
+#  - rotation is detected by a change of inode, truncation by the file
+#    shrinking below the read offset
+#  - the offset of the last line handed to the caller is checkpointed to
+#    state_file, so a restart resumes exactly after the last processed
+#    line (nothing skipped, nothing sent twice)
+#  - stats() reports lines/s and lag (bytes written but not yet read)
+
+
+class _ChangeHandler(FileSystemEventHandler):
+    def __init__(self, path, wakeup):
+        self.path = os.path.abspath(path)
+        self.wakeup = wakeup
+
+    def on_any_event(self, event):
+        paths = (getattr(event, 'src_path', None), getattr(event, 'dest_path', None))
+        if self.path in [os.path.abspath(p) for p in paths if p]:
+            self.wakeup.set()
+
+
+class LogTailer:
+    def __init__(self, path, state_file=None, chunk_size=1024 * 1024, poll_interval=0.1,
+                 start_at_end=True, checkpoint_interval=1.0, use_notify=True, encoding='utf-8'):
+        """
+        path: file to follow; it may not exist yet.
+        state_file: JSON file for the persisted offset (None = no persistence).
+        start_at_end: without saved state, skip what is already in the file
+             (the old monitor_snort behaviour) instead of reading it all.
+        """
+        self.path = path
+        self.state_file = state_file
+        self.chunk_size = chunk_size
+        self.poll_interval = poll_interval
+        self.start_at_end = start_at_end
+        self.checkpoint_interval = checkpoint_interval
+        self.encoding = encoding
+
+        self._file = None
+        self._inode = None
+        self._offset = 0             # end of the last complete line read
+        self._committed_offset = 0   # end of the last line the caller finished
+        self._generation = 0         # bumped on rotation/truncation; offsets before it are void
+        self._partial = b''
+        self._last_checkpoint = 0.0
+
+        self.lines = 0
+        self.rotations = 0
+        self.truncations = 0
+        self._rate = 0.0
+        self._rate_start = time.monotonic()
+        self._rate_lines = 0
+
+        self._wakeup = threading.Event()
+        self._observer = None
+        if use_notify and Observer is not None:
+            self._start_observer()
+
+    # --------------------------------------------------------
+    # Public API
+    # --------------------------------------------------------
+    def batches(self, max_bytes=None):
+        """
+        Yield lists of new lines forever, each from at most about
+        max_bytes (default: chunk_size) so a backlog is never read into
+        memory at once. The offset of a batch is committed when the
+        caller asks for the next one, i.e. after the batch has been
+        processed.
+        """
+        max_bytes = max_bytes or self.chunk_size
+        try:
+            while True:
+                lines = self.read_available(max_bytes=max_bytes)
+                if lines:
+                    yield lines
+                    self.commit()
+                else:
+                    self.wait()
+        finally:
+            self.close()
+
+    def read_available(self, max_bytes=None):
+        """
+        Read everything written since the last call (non-blocking), or
+        stop after about max_bytes so a large backlog is handed out in
+        bounded pieces.
+        """
+        if self._file is None and not self._open():
+            return []
+
+        self._check_rotation()
+        lines = []
+        read = 0
+        while self._file is not None:
+            chunk = self._file.read(self.chunk_size)
+            if not chunk:
+                break
+            lines.extend(self._split(chunk))
+            read += len(chunk)
+            if len(chunk) < self.chunk_size or (max_bytes and read >= max_bytes):
+                break
+
+        self.lines += len(lines)
+        self._update_rate(len(lines))
+        return lines
+
+    def position(self):
+        """Token for "everything returned so far", to commit() later."""
+        return (self._generation, self._offset)
+
+    def commit(self, position=None):
+        """
+        Mark every line returned so far (or up to an earlier position())
+        as processed. A position from before a rotation or truncation is
+        ignored: it points into a file the tailer no longer reads.
+        """
+        if position is None:
+            self._committed_offset = self._offset
+        elif position[0] == self._generation:
+            self._committed_offset = position[1]
+        else:
+            return
+        if self.state_file and time.monotonic() - self._last_checkpoint >= self.checkpoint_interval:
+            self.save_state()
+
+    def wait(self, timeout=None):
+        """Sleep until the file changes (or poll_interval passes)."""
+        if timeout is None:
+            # with notifications the poll is only a safety net
+            timeout = self.poll_interval * (10 if self._observer else 1)
+        self._wakeup.wait(timeout)
+        self._wakeup.clear()
+
+    def stats(self):
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            size = self._offset
+        return {
+            'path': self.path,
+            'offset': self._committed_offset,
+            'lagBytes': max(0, size - self._offset),
+            'lines': self.lines,
+            'linesPerSecond': round(self._rate, 1),
+            'rotations': self.rotations,
+            'truncations': self.truncations,
+            'notify': self._observer is not None
+        }
+
+    def save_state(self):
+        if not self.state_file or self._inode is None:
+            return
+        state = {'path': self.path, 'inode': self._inode, 'offset': self._committed_offset}
+        tmp = self.state_file + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(tmp, self.state_file)
+        self._last_checkpoint = time.monotonic()
+
+    def close(self):
+        self.save_state()
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    # --------------------------------------------------------
+    # Internals
+    # --------------------------------------------------------
+    def _start_observer(self):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        try:
+            observer = Observer()
+            observer.schedule(_ChangeHandler(self.path, self._wakeup), directory, recursive=False)
+            observer.daemon = True
+            observer.start()
+            self._observer = observer
+        except Exception as e:
+            # e.g. the directory does not exist yet or inotify watches are exhausted
+            log.warning("File notifications unavailable for %s, polling instead: %s", self.path, e)
+            self._observer = None
+
+    def _load_state(self):
+        if not self.state_file or not os.path.exists(self.state_file):
+            return None
+        try:
+            with open(self.state_file, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _open(self, rotated=False):
+        try:
+            f = open(self.path, 'rb')
+        except OSError:
+            return False
+        st = os.fstat(f.fileno())
+
+        if rotated:
+            # a new file after rotation is always read from its beginning
+            offset = 0
+        else:
+            state = self._load_state()
+            if state and state.get('inode') == st.st_ino and state.get('offset', 0) <= st.st_size:
+                offset = state['offset']
+            elif state or not self.start_at_end:
+                # the file was rotated or truncated while we were down
+                offset = 0
+            else:
+                offset = st.st_size
+
+        f.seek(offset)
+        self._file = f
+        self._inode = st.st_ino
+        self._offset = self._committed_offset = offset
+        self._generation += 1
+        self._partial = b''
+        return True
+
+    def _check_rotation(self):
+        """Handle rotation/truncation before a read."""
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            # moved away and not recreated yet: keep draining the old handle
+            return
+
+        if st.st_ino != self._inode:
+            # the rest of the rotated file is read through the old handle
+            # (in bounded pieces, like any backlog) and committed by the
+            # caller; only then switch to the new file
+            if os.fstat(self._file.fileno()).st_size > self._file.tell():
+                return
+            self._file.close()
+            self._file = None
+            self.rotations += 1
+            self._open(rotated=True)
+            return
+        if st.st_size < self._offset + len(self._partial):
+            self._file.seek(0)
+            self._offset = self._committed_offset = 0
+            self._partial = b''
+            self.truncations += 1
+            self._generation += 1
+
+    def _split(self, chunk):
+        data = self._partial + chunk
+        end = data.rfind(b'\n')
+        if end < 0:
+            self._partial = data
+            return []
+        complete, self._partial = data[:end + 1], data[end + 1:]
+        self._offset += len(complete)
+        return complete.decode(self.encoding, errors='ignore').splitlines()
+
+    def _update_rate(self, n):
+        self._rate_lines += n
+        elapsed = time.monotonic() - self._rate_start
+        if elapsed >= 1.0:
+            self._rate = self._rate_lines / elapsed
+            self._rate_lines = 0
+            self._rate_start = time.monotonic()
@@ -0,0 +1,131 @@
+import os
+import threading
+import queue
+import time
+from concurrent.futures import Future
+
+# ------------------------------------------------------------
+# Micro-Batching Queue
+# ------------------------------------------------------------
+# Single-line /predict callers each submit one log string. A background
+# thread takes whatever is queued (up to max_batch_size lines) and scores
+# it with one vectorized call, then hands every caller its own row of the
+# result. Once the queue is drained the batch goes out immediately; it
+# only waits (at most max_wait_ms) for callers that are already inside
+# submit() but have not queued their line yet. A lone caller never waits,
+# and under load the lines arriving while a batch is scored form the next
+# batch.
+
+# upper bounds of the batch-size histogram buckets (last one catches the rest)
+BATCH_SIZE_BUCKETS = [1, 2, 4, 8, 16, 32, 64, 128, 256, 512]
+
+
+class MicroBatcher:
+    def __init__(self, score_fn, max_batch_size=64, max_wait_ms=5):
+        """
+        score_fn: callable taking a list of log strings and returning a
+        list of results of the same length, in the same order.
+        """
+        self.score_fn = score_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._submit_lock = threading.Lock()
+        self._submitted = 0   # lines handed to submit(), incremented before queuing
+        self._taken = 0       # lines the worker has taken off the queue
+        self._batches = 0
+        self._items = 0
+        self._max_queue_depth = 0
+        self._histogram = [0] * (len(BATCH_SIZE_BUCKETS) + 1)
+
+        # the worker thread is started on first use, by the process that uses
+        # it: threads do not survive os.fork (see serve.py)
+        self._worker = None
+        self._worker_pid = None
+        self._start_lock = threading.Lock()
+
+    def _ensure_worker(self):
+        if self._worker_pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._worker_pid != os.getpid():
+                self._queue = queue.Queue()
+                self._submitted = self._taken = 0
+                self._worker = threading.Thread(target=self._run, name='micro-batcher', daemon=True)
+                self._worker.start()
+                self._worker_pid = os.getpid()
+
+    def submit(self, log_text):
+        """Queue one log line and block until its batch has been scored."""
+        self._ensure_worker()
+        future = Future()
+        with self._submit_lock:
+            self._submitted += 1
+        self._queue.put((log_text, future))
+        depth = self._queue.qsize()
+        if depth > self._max_queue_depth:
+            self._max_queue_depth = depth
+        return future.result()
+
+    def stats(self):
+        """Queue depth and batch-size histogram for the stats endpoint."""
+        with self._lock:
+            labels = [f"<={b}" for b in BATCH_SIZE_BUCKETS] + [f">{BATCH_SIZE_BUCKETS[-1]}"]
+            return {
+                'queueDepth': self._queue.qsize(),
+                'maxQueueDepth': self._max_queue_depth,
+                'batches': self._batches,
+                'items': self._items,
+                'avgBatchSize': round(self._items / self._batches, 2) if self._batches else 0.0,
+                'batchSizeHistogram': dict(zip(labels, self._histogram)),
+                'maxBatchSize': self.max_batch_size,
+                'maxWaitMs': self.max_wait * 1000.0
+            }
+
+    def _collect(self):
+        # block for the first line, then drain the queue; wait (within the
+        # window that started with the first line) only while some caller
+        # has entered submit() without its line having reached the queue
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+                continue
+            except queue.Empty:
+                pass
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or self._submitted <= self._taken + len(batch):
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        self._taken += len(batch)
+        return batch
+
+    def _record(self, size):
+        bucket = len(BATCH_SIZE_BUCKETS)
+        for i, upper in enumerate(BATCH_SIZE_BUCKETS):
+            if size <= upper:
+                bucket = i
+                break
+        with self._lock:
+            self._batches += 1
+            self._items += size
+            self._histogram[bucket] += 1
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            self._record(len(batch))
+            try:
+                results = self.score_fn([log_text for log_text, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
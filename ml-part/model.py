@@ -1,11 +1,26 @@
+import argparse
+import heapq
+import os
+import sys
+import time
 import pandas as pd
+import numpy as np
+from collections import Counter
 from sklearn.model_selection import train_test_split as tts
 from sklearn.feature_extraction.text import TfidfVectorizer as TFIDF
+from sklearn.feature_extraction.text import CountVectorizer
 from sklearn.linear_model import LogisticRegression as LR
+from sklearn.linear_model import SGDClassifier
 from sklearn.pipeline import make_pipeline as mp
 import joblib as jl
 import warnings as w
 from sklearn.metrics import classification_report, accuracy_score
+from fastScorer import export_artifact, FastScorer, check_parity
+
+try:
+    import resource  # not available on Windows
+except ImportError:
+    resource = None
 
 # --- Configuration ---
 w.filterwarnings("ignore")
@@ -22,95 +37,346 @@ labelCol = 'Output'
 # OUTPUT: Save the trained model
 output_model_file = 'finalTrainedModel.joblib'
 
-# --- Load Dataset ---
-print(f"Loading labeled dataset: {dataset}")
-try:
-    df = pd.read_csv(dataset, on_bad_lines='skip', low_memory=False, encoding='utf-8')
-except UnicodeDecodeError:
-    print("UTF-8 failed, trying latin-1...")
-    df = pd.read_csv(dataset, on_bad_lines='skip', low_memory=False, encoding='latin-1')
-except FileNotFoundError:
-    print(f"Error: The file '{dataset}' was not found. Please check its path.")
-    exit()
-
-# --- Validate Columns ---
-if textCol not in df.columns:
-    print(f"\n*** ERROR: Feature column '{textCol}' not found in '{dataset}'! ***")
-    print(f"Columns found: {df.columns.tolist()}")
-    exit()
-
-if labelCol not in df.columns:
-    print(f"\n*** ERROR: Label column '{labelCol}' not found in '{dataset}'! ***")
-    print(f"Columns found: {df.columns.tolist()}")
-    exit()
-
-# --- Data Cleaning ---
-df = df.dropna(subset=[textCol, labelCol])
-df[textCol] = df[textCol].astype(str)
-df[labelCol] = df[labelCol].astype(int)
-
-X = df[textCol]
-y = df[labelCol]
-
-if X.empty or y.empty or len(y.unique()) < 2:
-    print("\nError: Dataset empty or only one class present after cleaning.")
-    exit()
-
-print(f"Dataset loaded with {len(X)} samples.")
-print("Label distribution:")
-print(y.value_counts(normalize=True))
-
-is_imbalanced = y.mean() < 0.05 or y.mean() > 0.95
-print(f"Dataset appears {'imbalanced' if is_imbalanced else 'reasonably balanced'}.")
-
-# --- Create Model Pipeline ---
-print("\nCreating Logistic Regression training pipeline...")
-pipeline = mp(
-    TFIDF(
-        max_features=3000,  # slightly increased for variety
-        stop_words='english',
-        max_df=0.8,
-        min_df=3
-    ),
-    LR(
-        max_iter=1000,
-        class_weight='balanced',
-        solver='liblinear',
-        random_state=42
+# OUTPUT: Compact artifact for the fast scoring path in app.py
+output_fast_model_dir = 'finalTrainedModel.fast'
+
+# VECTORIZER: shared by the in-memory and streaming modes
+max_features = 3000  # slightly increased for variety
+min_df = 3
+max_df = 0.8
+test_size = 0.25
+
+# STREAMING: rows per CSV chunk; peak memory scales with this, not the file size
+default_chunk_size = 100000
+
+# pass 1 tracks at most this many distinct terms; past it the rarest half
+# is dropped, so the vocabulary is exact until a dataset has this many
+max_tracked_terms = 500000
+
+# how many held-out rows to keep around for the fast-scorer parity check
+parity_sample_size = 10000
+
+
+def peak_memory_mb():
+    """Peak resident memory of this process in MB (None where unsupported)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes on Linux
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def report_resources(timings):
+    print("\n-- Resource Report --")
+    for step, seconds in timings.items():
+        print(f"{step:<28} {seconds:8.2f} s")
+    peak = peak_memory_mb()
+    print(f"{'Peak memory (RSS)':<28} {peak:8.1f} MB" if peak is not None else "Peak memory (RSS): n/a on this platform")
+
+
+def save_model(pipeline, parity_logs, model_version):
+    print(f"\nSaving trained model to '{output_model_file}'...")
+    # dump next to the target and rename: app.py may have the old file
+    # memory-mapped (MODEL_MMAP), and rewriting it in place would change
+    # the arrays under the running workers
+    tmp = output_model_file + '.tmp'
+    jl.dump(pipeline, tmp)
+    os.replace(tmp, output_model_file)
+
+    print(f"Exporting fast inference artifact to '{output_fast_model_dir}'...")
+    export_artifact(pipeline, output_fast_model_dir, model_version=model_version)
+    mismatches = check_parity(pipeline, FastScorer.load(output_fast_model_dir), parity_logs)
+    if mismatches:
+        print(f"⚠️ Fast scorer differs from the pipeline on {mismatches} test rows; app.py should use the joblib model.")
+    else:
+        print(f"✅ Fast scorer matches pipeline.predict_proba exactly on {len(parity_logs)} test rows.")
+
+
+# ------------------------------------------------------------
+# In-memory training (whole CSV in one DataFrame)
+# ------------------------------------------------------------
+def load_dataset():
+    """Load, validate and clean the labeled CSV; returns (X, y)."""
+    # --- Load Dataset ---
+    print(f"Loading labeled dataset: {dataset}")
+    try:
+        df = pd.read_csv(dataset, on_bad_lines='skip', low_memory=False, encoding='utf-8')
+    except UnicodeDecodeError:
+        print("UTF-8 failed, trying latin-1...")
+        df = pd.read_csv(dataset, on_bad_lines='skip', low_memory=False, encoding='latin-1')
+    except FileNotFoundError:
+        print(f"Error: The file '{dataset}' was not found. Please check its path.")
+        exit()
+
+    # --- Validate Columns ---
+    if textCol not in df.columns:
+        print(f"\n*** ERROR: Feature column '{textCol}' not found in '{dataset}'! ***")
+        print(f"Columns found: {df.columns.tolist()}")
+        exit()
+
+    if labelCol not in df.columns:
+        print(f"\n*** ERROR: Label column '{labelCol}' not found in '{dataset}'! ***")
+        print(f"Columns found: {df.columns.tolist()}")
+        exit()
+
+    # --- Data Cleaning ---
+    df = df.dropna(subset=[textCol, labelCol])
+    df[textCol] = df[textCol].astype(str)
+    df[labelCol] = df[labelCol].astype(int)
+
+    X = df[textCol]
+    y = df[labelCol]
+
+    if X.empty or y.empty or len(y.unique()) < 2:
+        print("\nError: Dataset empty or only one class present after cleaning.")
+        exit()
+
+    print(f"Dataset loaded with {len(X)} samples.")
+    print("Label distribution:")
+    print(y.value_counts(normalize=True))
+
+    is_imbalanced = y.mean() < 0.05 or y.mean() > 0.95
+    print(f"Dataset appears {'imbalanced' if is_imbalanced else 'reasonably balanced'}.")
+    return X, y
+
+
+def train_in_memory():
+    timings = {}
+    start = time.perf_counter()
+    X, y = load_dataset()
+    timings['Load dataset'] = time.perf_counter() - start
+
+    # --- Create Model Pipeline ---
+    print("\nCreating Logistic Regression training pipeline...")
+    pipeline = mp(
+        TFIDF(
+            max_features=max_features,
+            stop_words='english',
+            max_df=max_df,
+            min_df=min_df
+        ),
+        LR(
+            max_iter=1000,
+            class_weight='balanced',
+            solver='liblinear',
+            random_state=42
+        )
     )
-)
 
-# --- Train/Test Split ---
-print("Splitting data and training model...")
-try:
-    X_train, X_test, y_train, y_test = tts(X, y, test_size=0.25, random_state=42, stratify=y)
-except ValueError:
-    print("Warning: Stratified split failed, falling back to regular split.")
-    X_train, X_test, y_train, y_test = tts(X, y, test_size=0.25, random_state=42)
+    # --- Train/Test Split ---
+    print("Splitting data and training model...")
+    try:
+        X_train, X_test, y_train, y_test = tts(X, y, test_size=test_size, random_state=42, stratify=y)
+    except ValueError:
+        print("Warning: Stratified split failed, falling back to regular split.")
+        X_train, X_test, y_train, y_test = tts(X, y, test_size=test_size, random_state=42)
 
-# --- Model Training ---
-pipeline.fit(X_train, y_train)
+    # --- Model Training ---
+    start = time.perf_counter()
+    pipeline.fit(X_train, y_train)
+    timings['Fit'] = time.perf_counter() - start
 
-# --- Evaluation ---
-y_pred = pipeline.predict(X_test)
-accuracy = accuracy_score(y_test, y_pred)
-print(f"\n✅ Model Accuracy on Your PC Logs: {accuracy * 100:.2f}%")
+    # --- Evaluation ---
+    start = time.perf_counter()
+    y_pred = pipeline.predict(X_test)
+    timings['Evaluate'] = time.perf_counter() - start
+    accuracy = accuracy_score(y_test, y_pred)
+    print(f"\n✅ Model Accuracy on Your PC Logs: {accuracy * 100:.2f}%")
 
-print("\n-- Classification Report --")
-try:
-    if len(set(y_test)) > 1 and len(set(y_pred)) > 1:
-        print(classification_report(y_test, y_pred, target_names=['Safe (0)', 'Suspicious (1)'], zero_division=0))
+    print("\n-- Classification Report --")
+    try:
+        if len(set(y_test)) > 1 and len(set(y_pred)) > 1:
+            print(classification_report(y_test, y_pred, target_names=['Safe (0)', 'Suspicious (1)'], zero_division=0))
+        else:
+            print("⚠️ Only one class present in test or predicted data.")
+            print(f"Accuracy score: {accuracy}")
+            print(f"Unique predictions: {set(y_pred)}")
+    except Exception as e:
+        print(f"Could not generate classification report: {e}")
+
+    # --- Save Model ---
+    start = time.perf_counter()
+    save_model(pipeline, X_test, 'v1.1-logistic-regression')
+    timings['Save + export'] = time.perf_counter() - start
+    report_resources(timings)
+
+
+# ------------------------------------------------------------
+# Streaming / out-of-core training (CSV read in chunks)
+# ------------------------------------------------------------
+# Pass 1 counts term and document frequencies chunk by chunk to build the
+# same vocabulary and idf TfidfVectorizer(max_features, min_df, max_df)
+# would. Pass 2 (repeated per epoch) trains an SGD logistic regression
+# with partial_fit. Pass 3 evaluates on the held-out rows. Only one chunk
+# plus the term counters are ever in memory.
+def stream_chunks(chunk_size, seed=42):
+    """Yield (texts, labels, is_test) per cleaned CSV chunk; the split is the same every pass."""
+    rng = np.random.default_rng(seed)
+    try:
+        reader = pd.read_csv(
+            dataset,
+            usecols=[textCol, labelCol],
+            chunksize=chunk_size,
+            on_bad_lines='skip',
+            encoding='utf-8',
+            encoding_errors='replace'
+        )
+        for chunk in reader:
+            # draw before cleaning so every pass sees identical draws
+            is_test = rng.random(len(chunk)) < test_size
+            keep = chunk[textCol].notna() & chunk[labelCol].notna()
+            texts = chunk.loc[keep, textCol].astype(str)
+            labels = chunk.loc[keep, labelCol].astype(int).to_numpy()
+            yield texts, labels, is_test[keep.to_numpy()]
+    except FileNotFoundError:
+        print(f"Error: The file '{dataset}' was not found. Please check its path.")
+        exit()
+    except ValueError as e:
+        # usecols names a column the CSV does not have
+        print(f"\n*** ERROR: {e} ***")
+        exit()
+
+
+def prune_counts(term_counts, doc_counts, keep):
+    """Keep only the `keep` most frequent terms (the ones max_features picks from)."""
+    kept = heapq.nlargest(keep, term_counts.items(), key=lambda item: (item[1], doc_counts[item[0]]))
+    pruned = len(term_counts) - len(kept)
+    term_counts.clear()
+    term_counts.update(dict(kept))
+    kept_docs = {t: doc_counts[t] for t in term_counts}
+    doc_counts.clear()
+    doc_counts.update(kept_docs)
+    return pruned
+
+
+def build_vocabulary(chunk_size, max_terms=max_tracked_terms):
+    """
+    Pass 1: vocabulary + idf equivalent to TfidfVectorizer.fit on the train rows.
+    Memory is bounded by max_terms: once more distinct terms than that have
+    been seen, the least frequent are dropped (a dropped term that comes
+    back starts counting again, so only the long tail is approximate).
+    """
+    counter = CountVectorizer(stop_words='english')
+    term_counts = Counter()
+    doc_counts = Counter()
+    label_counts = Counter()
+    n_docs = 0
+    pruned = 0
+
+    for texts, labels, is_test in stream_chunks(chunk_size):
+        train_texts = texts[~is_test]
+        label_counts.update(labels[~is_test].tolist())
+        n_docs += len(train_texts)
+        try:
+            X = counter.fit_transform(train_texts)
+        except ValueError:
+            # chunk without a single usable token
+            continue
+        terms = counter.get_feature_names_out()
+        term_counts.update(dict(zip(terms, np.asarray(X.sum(axis=0)).ravel().tolist())))
+        doc_counts.update(dict(zip(terms, np.diff(X.tocsc().indptr).tolist())))
+        if len(term_counts) > max_terms:
+            pruned += prune_counts(term_counts, doc_counts, max_terms // 2)
+
+    if pruned:
+        print(f"Vocabulary pass dropped {pruned} rare terms to stay under {max_terms} tracked terms")
+
+    max_doc_count = max_df * n_docs
+    candidates = sorted(t for t, df_count in doc_counts.items() if min_df <= df_count <= max_doc_count)
+    if len(candidates) > max_features:
+        # pick the max_features most frequent terms exactly as
+        # CountVectorizer._limit_features does (argsort over the
+        # alphabetically ordered terms), so equal counts break the same way
+        counts = np.array([term_counts[t] for t in candidates], dtype=np.int64)
+        keep = np.sort((-counts).argsort()[:max_features])
+        candidates = [candidates[i] for i in keep]
+    vocabulary = candidates
+
+    df_array = np.array([doc_counts[t] for t in vocabulary], dtype=np.float64)
+    idf = np.log((1 + n_docs) / (1 + df_array)) + 1  # smooth_idf=True
+    return vocabulary, idf, label_counts, n_docs
+
+
+def train_streaming(chunk_size, epochs):
+    timings = {}
+
+    print(f"Streaming labeled dataset: {dataset} (chunks of {chunk_size} rows)")
+    start = time.perf_counter()
+    vocabulary, idf, label_counts, n_docs = build_vocabulary(chunk_size)
+    timings['Pass 1: vocabulary'] = time.perf_counter() - start
+
+    if n_docs == 0 or len(label_counts) < 2 or not vocabulary:
+        print("\nError: Dataset empty or only one class present after cleaning.")
+        exit()
+
+    print(f"Training rows: {n_docs}, vocabulary size: {len(vocabulary)}")
+    print(f"Label distribution: { {k: round(v / n_docs, 4) for k, v in sorted(label_counts.items())} }")
+
+    vectorizer = TFIDF(vocabulary=vocabulary, stop_words='english')
+    vectorizer.idf_ = idf
+
+    # class_weight='balanced' needs all labels up front, so compute it from pass 1
+    classes = np.array(sorted(label_counts))
+    class_weight = {c: n_docs / (len(classes) * label_counts[c]) for c in classes}
+    classifier = SGDClassifier(loss='log_loss', class_weight=class_weight, random_state=42)
+
+    print(f"\nTraining SGD logistic regression with partial_fit ({epochs} epoch(s))...")
+    start = time.perf_counter()
+    for epoch in range(epochs):
+        for texts, labels, is_test in stream_chunks(chunk_size):
+            if (~is_test).any():
+                classifier.partial_fit(vectorizer.transform(texts[~is_test]), labels[~is_test], classes=classes)
+        print(f"   epoch {epoch + 1}/{epochs} done")
+    timings['Pass 2: partial_fit'] = time.perf_counter() - start
+
+    pipeline = mp(vectorizer, classifier)
+
+    # --- Evaluation on the held-out stream ---
+    start = time.perf_counter()
+    confusion = np.zeros((2, 2), dtype=np.int64)
+    parity_logs = []
+    for texts, labels, is_test in stream_chunks(chunk_size):
+        if not is_test.any():
+            continue
+        test_texts = texts[is_test]
+        y_pred = pipeline.predict(test_texts)
+        np.add.at(confusion, (labels[is_test], y_pred), 1)
+        if len(parity_logs) < parity_sample_size:
+            parity_logs.extend(test_texts.iloc[:parity_sample_size - len(parity_logs)].tolist())
+    timings['Pass 3: evaluate'] = time.perf_counter() - start
+
+    total = confusion.sum()
+    accuracy = np.trace(confusion) / total if total else 0.0
+    print(f"\n✅ Model Accuracy on held-out stream ({total} rows): {accuracy * 100:.2f}%")
+    print("\n-- Classification Report --")
+    for label, name in enumerate(['Safe (0)', 'Suspicious (1)']):
+        tp = confusion[label, label]
+        precision = tp / confusion[:, label].sum() if confusion[:, label].sum() else 0.0
+        recall = tp / confusion[label, :].sum() if confusion[label, :].sum() else 0.0
+        f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+        print(f"{name:>16}  precision {precision:.2f}  recall {recall:.2f}  f1 {f1:.2f}  support {confusion[label, :].sum()}")
+
+    start = time.perf_counter()
+    save_model(pipeline, parity_logs, 'v1.2-sgd-streaming')
+    timings['Save + export'] = time.perf_counter() - start
+    report_resources(timings)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Train the PC log classifier.")
+    parser.add_argument('--stream', action='store_true',
+                        help="out-of-core training: read the CSV in chunks instead of loading it whole")
+    parser.add_argument('--chunk-size', type=int, default=default_chunk_size,
+                        help=f"rows per chunk in --stream mode (default {default_chunk_size})")
+    parser.add_argument('--epochs', type=int, default=1,
+                        help="passes over the training rows in --stream mode (default 1)")
+    args = parser.parse_args()
+
+    if args.stream:
+        train_streaming(args.chunk_size, args.epochs)
     else:
-        print("⚠️ Only one class present in test or predicted data.")
-        print(f"Accuracy score: {accuracy}")
-        print(f"Unique predictions: {set(y_pred)}")
-except Exception as e:
-    print(f"Could not generate classification report: {e}")
-
-# --- Save Model ---
-print(f"\nSaving trained model to '{output_model_file}'...")
-jl.dump(pipeline, output_model_file)
-
-print("\n--- Training Complete! ---")
-print(f"✅ Model '{output_model_file}' is ready to classify new PC logs.")
-print("You can now use this model with your 'predict_pc_logs.py' script to test unseen logs.")
\ No newline at end of file
+        train_in_memory()
+
+    print("\n--- Training Complete! ---")
+    print(f"✅ Model '{output_model_file}' is ready to classify new PC logs.")
+    print("You can now use this model with your 'predict_pc_logs.py' script to test unseen logs.")
@@ -0,0 +1,139 @@
+import hashlib
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+# ------------------------------------------------------------
+# Log Text Normalization
+# ------------------------------------------------------------
+# The TF-IDF vectorizer lowercases its input and only looks at word
+# tokens, so case and runs of whitespace never change a prediction and
+# are always folded. Masking IPs, ports and PIDs is optional: it raises
+# the hit rate on repetitive streams, but lines that differ only in
+# those values will share one cached result. Each option masks only its
+# own values ('ports' keeps the address in "10.0.0.1:443").
+IP_PATTERN = re.compile(r'\b\d{1,3}(?:\.\d{1,3}){3}\b')
+PORT_PATTERN = re.compile(r'(\b\d{1,3}(?:\.\d{1,3}){3}|<ip>):\d{1,5}\b|\bport\s+\d{1,5}\b', re.IGNORECASE)
+PID_PATTERN = re.compile(r'\b(?:pid|process id)\s*[:=]?\s*\d+\b', re.IGNORECASE)
+WHITESPACE_PATTERN = re.compile(r'\s+')
+
+MASK_OPTIONS = ('ips', 'ports', 'pids')
+
+
+def normalize_log(log_text, mask=()):
+    """Normalize a log line for use as a cache key."""
+    text = WHITESPACE_PATTERN.sub(' ', log_text).strip().lower()
+    if 'ips' in mask:
+        text = IP_PATTERN.sub('<ip>', text)
+    if 'ports' in mask:
+        text = PORT_PATTERN.sub(lambda m: f'{m.group(1)}:<port>' if m.group(1) else 'port <port>', text)
+    if 'pids' in mask:
+        text = PID_PATTERN.sub('pid <pid>', text)
+    return text
+
+
+# ------------------------------------------------------------
+# LRU / TTL Prediction Cache
+# ------------------------------------------------------------
+class PredictionCache:
+    def __init__(self, max_entries=10000, ttl_seconds=3600, mask=(), model_path=None, check_interval=1.0):
+        """
+        max_entries: LRU bound; least recently used entries are evicted.
+        ttl_seconds: entries older than this are treated as misses (0 = no TTL).
+        mask: any of 'ips', 'ports', 'pids' (see normalize_log).
+        model_path: when the file's size or mtime changes the cache is cleared.
+        """
+        unknown = set(mask) - set(MASK_OPTIONS)
+        if unknown:
+            raise ValueError(f"Unknown mask option(s): {sorted(unknown)}")
+
+        self.max_entries = max(1, int(max_entries))
+        self.ttl = float(ttl_seconds)
+        self.mask = tuple(mask)
+        self.model_path = model_path
+        self.check_interval = check_interval
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._model_signature = self._read_model_signature()
+        self._next_model_check = time.monotonic() + check_interval
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def key(self, log_text):
+        normalized = normalize_log(log_text, self.mask)
+        return hashlib.blake2b(normalized.encode('utf-8', 'replace'), digest_size=16).digest()
+
+    def get(self, log_text):
+        """Return the cached prediction for log_text, or None on a miss."""
+        self._check_model()
+        key = self.key(log_text)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            stored_at, value = entry
+            if self.ttl and time.monotonic() - stored_at > self.ttl:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, log_text, value):
+        key = self.key(log_text)
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxEntries': self.max_entries,
+                'ttlSeconds': self.ttl,
+                'mask': list(self.mask),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hitRatio': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations
+            }
+
+    def _read_model_signature(self):
+        if not self.model_path:
+            return None
+        try:
+            st = os.stat(self.model_path)
+        except OSError:
+            return None
+        return (st.st_size, st.st_mtime_ns)
+
+    def _check_model(self):
+        # stat() the model file at most once per check_interval
+        if not self.model_path or time.monotonic() < self._next_model_check:
+            return
+        self._next_model_check = time.monotonic() + self.check_interval
+        signature = self._read_model_signature()
+        if signature != self._model_signature:
+            self._model_signature = signature
+            self.clear()
@@ -0,0 +1,201 @@
+import argparse
+import gc
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+import traceback
+
+# serve.py loads the model memory-mapped before app.py is imported
+os.environ.setdefault('MODEL_MMAP', '1')
+
+import app as ml_app  # noqa: E402  (loads the model once, in the master)
+from werkzeug.serving import make_server  # noqa: E402
+
+# ------------------------------------------------------------
+# Production Serving (pre-fork)
+# ------------------------------------------------------------
+# `python serve.py --workers N` replaces app.run(debug=True) for
+# production:
+#
+#  - the master loads the model once (NumPy arrays memory-mapped, so the
+#    page cache holds a single copy) and binds the listening socket
+#  - it then forks N workers that inherit both; each worker runs a
+#    threaded WSGI server on the shared socket and the kernel spreads
+#    connections across them
+#  - the master checks the model file every --reload-interval seconds
+#    (or on SIGHUP); when it changed it loads the new model and replaces
+#    the workers one at a time, each old worker finishing its in-flight
+#    requests first, so there is no gap in service
+#  - crashed workers are restarted; SIGTERM/SIGINT stop everything
+#
+# /healthz and /readyz (app.py) report liveness and readiness per worker.
+# os.fork is POSIX-only: on Windows this falls back to one process.
+
+GRACEFUL_TIMEOUT_SECONDS = 30
+
+
+def model_signature():
+    try:
+        st = os.stat(ml_app.model_file())
+    except OSError:
+        return None
+    return (st.st_size, st.st_mtime_ns)
+
+
+# ------------------------------------------------------------
+# Worker
+# ------------------------------------------------------------
+def run_worker(sock):
+    server = make_server(sock.getsockname()[0], sock.getsockname()[1], ml_app.app, threaded=True, fd=sock.fileno())
+    # let in-flight requests finish when the worker is told to stop
+    server.daemon_threads = False
+    server.block_on_close = True
+
+    def stop(signum, frame):
+        threading.Thread(target=server.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # the master handles Ctrl+C
+    signal.signal(signal.SIGHUP, signal.SIG_IGN)
+
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+
+
+# ------------------------------------------------------------
+# Master
+# ------------------------------------------------------------
+class Master:
+    def __init__(self, sock, workers, reload_interval):
+        self.sock = sock
+        self.n_workers = workers
+        self.reload_interval = reload_interval
+        self.workers = set()
+        self.stopping = False
+        self.reload_requested = False
+        self.signature = model_signature()
+
+    def spawn(self):
+        # move everything loaded so far out of the GC's reach, so the
+        # collector in the children does not touch (and copy) those pages
+        gc.freeze()
+        pid = os.fork()
+        if pid == 0:
+            # the child must never return from here, or it would carry on
+            # as a second master running this process's loop
+            try:
+                run_worker(self.sock)
+            except BaseException:
+                print(f"❌ Worker {os.getpid()} failed:", file=sys.stderr)
+                traceback.print_exc()
+                sys.stderr.flush()
+                os._exit(1)
+            os._exit(0)
+        self.workers.add(pid)
+        return pid
+
+    def stop_worker(self, pid, timeout=GRACEFUL_TIMEOUT_SECONDS):
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            done, _ = os.waitpid(pid, os.WNOHANG)
+            if done:
+                break
+            time.sleep(0.05)
+        else:
+            os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+        self.workers.discard(pid)
+
+    def reap(self):
+        """Restart workers that exited on their own."""
+        while self.workers:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            if pid in self.workers:
+                self.workers.discard(pid)
+                if not self.stopping:
+                    print(f"⚠️ Worker {pid} exited (status {status}), starting a replacement.")
+                    self.spawn()
+
+    def reload(self):
+        print("🔄 Model change detected, reloading...")
+        if not ml_app.reload_model():
+            return
+        print(f"✅ Now serving model {ml_app.modelVersion}; replacing workers one at a time.")
+        for pid in list(self.workers):
+            self.spawn()
+            self.stop_worker(pid)
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self._on_stop)
+        signal.signal(signal.SIGINT, self._on_stop)
+        signal.signal(signal.SIGHUP, self._on_hup)
+
+        for _ in range(self.n_workers):
+            self.spawn()
+        print(f"🚀 Serving on http://{self.sock.getsockname()[0]}:{self.sock.getsockname()[1]} "
+              f"with {self.n_workers} workers (master pid {os.getpid()})")
+
+        next_check = time.monotonic() + self.reload_interval
+        while not self.stopping:
+            time.sleep(0.2)
+            self.reap()
+            if time.monotonic() >= next_check:
+                next_check = time.monotonic() + self.reload_interval
+                signature = model_signature()
+                if signature is not None and signature != self.signature:
+                    self.signature = signature
+                    self.reload_requested = True
+            if self.reload_requested and not self.stopping:
+                self.reload_requested = False
+                self.reload()
+
+        print("🛑 Shutting down workers...")
+        for pid in list(self.workers):
+            self.stop_worker(pid)
+        self.sock.close()
+
+    def _on_stop(self, signum, frame):
+        self.stopping = True
+
+    def _on_hup(self, signum, frame):
+        self.reload_requested = True
+
+
+def bind(host, port):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(1024)
+    sock.set_inheritable(True)
+    return sock
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Pre-forking production server for the log classifier.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--reload-interval', type=float, default=2.0,
+                        help="seconds between checks of the model file for hot reload")
+    args = parser.parse_args()
+
+    if not hasattr(os, 'fork'):
+        print("⚠️ os.fork is not available on this platform; serving from a single process.")
+        ml_app.app.run(host=args.host, port=args.port, threaded=True)
+        sys.exit(0)
+
+    Master(bind(args.host, args.port), args.workers, args.reload_interval).run()
@@ -0,0 +1,8 @@
+import os
+import sys
+
+# the modules under test live next to this directory (flat layout, no
+# package); snort-integration is added the way its own scripts add ml-part
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..'))
+sys.path.insert(1, os.path.join(HERE, '..', '..', 'snort-integration'))
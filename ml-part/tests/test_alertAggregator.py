@@ -0,0 +1,49 @@
+from alertAggregator import AlertAggregator
+
+
+def alert(i, severity='Low', src='10.0.0.1:1234'):
+    return {'alertId': f'A-{i}', 'sourceType': 'Snort IDS', 'severity': severity, 'logData': 'scan',
+            'msg': 'scan', 'src': src, 'dst': '10.0.0.2:80', 'proto': 'TCP'}
+
+
+def test_first_alert_is_emitted_immediately():
+    emitted = []
+    aggregator = AlertAggregator(emitted.append, window_seconds=60, autoflush=False)
+
+    aggregator.add(alert(1), now=100.0)
+
+    assert len(emitted) == 1
+    assert emitted[0]['alertId'] == 'A-1'
+    assert emitted[0]['count'] == 1
+    assert 'msg' not in emitted[0] and 'src' not in emitted[0]
+
+
+def test_duplicates_are_summarized_when_the_window_closes():
+    emitted = []
+    aggregator = AlertAggregator(emitted.append, window_seconds=10, autoflush=False)
+
+    aggregator.add(alert(1), now=100.0)
+    aggregator.add(alert(2, severity='High', src='10.0.0.1:5555'), now=103.0)
+    aggregator.add(alert(3), now=105.0)
+    assert aggregator.flush(now=109.0) == 0
+    assert len(emitted) == 1
+
+    assert aggregator.flush(now=110.0) == 1
+    summary = emitted[1]
+    assert summary['alertId'] == 'A-3'
+    assert summary['firstAlertId'] == 'A-1'
+    assert summary['count'] == 3
+    assert summary['severity'] == 'High'
+    assert (summary['firstSeen'], summary['lastSeen']) == (100, 105)
+    assert summary['logData'] == 'scan (x3, 5s)'
+
+
+def test_window_without_duplicates_emits_nothing_more():
+    emitted = []
+    aggregator = AlertAggregator(emitted.append, window_seconds=10, autoflush=False)
+
+    aggregator.add(alert(1), now=100.0)
+    aggregator.close()
+
+    assert [a['alertId'] for a in emitted] == ['A-1']
+    assert aggregator.stats()['openWindows'] == 0
@@ -0,0 +1,96 @@
+import json
+import socket
+import time
+
+from alertShipper import AlertShipper
+from benchmark import StubBackend
+
+
+def write_spill(path, ids):
+    with open(path, 'w', encoding='utf-8') as f:
+        for i in ids:
+            f.write(json.dumps({'alertId': f'A-{i}', 'severity': 'High', 'logData': 'x'}) + '\n')
+
+
+def unused_url():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        port = s.getsockname()[1]
+    return f'http://127.0.0.1:{port}/api/log-alert', f'http://127.0.0.1:{port}/api/log-alert/batch'
+
+
+def wait_for(condition, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.02)
+    return condition()
+
+
+def spilled_ids(shipper):
+    ids = set()
+    for path in (shipper.spill_file, shipper.replay_file):
+        try:
+            with open(path, encoding='utf-8') as f:
+                ids.update(json.loads(line)['alertId'] for line in f)
+        except FileNotFoundError:
+            pass
+    return ids
+
+
+def test_alerts_spill_while_backend_is_down_and_replay_later(tmp_path):
+    spill = str(tmp_path / 'spill.jsonl')
+    url, batch_url = unused_url()
+    shipper = AlertShipper(url=url, batch_url=batch_url, spill_file=spill, max_retries=0, flush_interval=0.05)
+    for i in range(120):
+        shipper.submit({'alertId': f'A-{i}'})
+    shipper.close()
+    assert shipper.stats()['spilled'] == 120
+
+    stub = StubBackend()
+    try:
+        shipper = AlertShipper(url=stub.url, batch_url=stub.batch_url, spill_file=spill, flush_interval=0.05)
+        assert wait_for(lambda: len(stub.received) == 120)
+        shipper.close()
+    finally:
+        stub.close()
+    assert not (tmp_path / 'spill.jsonl').exists()
+    assert not (tmp_path / 'spill.jsonl.replay').exists()
+
+
+def test_shutdown_mid_replay_keeps_the_rest_on_disk(tmp_path):
+    spill = str(tmp_path / 'spill.jsonl')
+    expected = {f'A-{i}' for i in range(2000)}
+    write_spill(spill, range(2000))
+
+    stub = StubBackend(delay_ms=20)
+    try:
+        shipper = AlertShipper(url=stub.url, batch_url=stub.batch_url, spill_file=spill, flush_interval=0.05)
+        assert wait_for(lambda: len(stub.received) >= 100)
+        shipper.close(timeout=1.0)
+        time.sleep(0.2)  # let a worker that outlived the timeout finish its batch
+        delivered = set(stub.received)
+        assert delivered | spilled_ids(shipper) == expected
+        assert len(delivered) < len(expected)
+
+        # the next start resumes from the saved offset
+        shipper = AlertShipper(url=stub.url, batch_url=stub.batch_url, spill_file=spill, flush_interval=0.05)
+        assert wait_for(lambda: set(stub.received) == expected)
+        shipper.close()
+    finally:
+        stub.close()
+    assert spilled_ids(shipper) == set()
+
+
+def test_leftover_replay_is_picked_up_and_not_overwritten(tmp_path):
+    spill = str(tmp_path / 'spill.jsonl')
+    write_spill(spill + '.replay', range(0, 30))   # left by a crash mid-replay
+    write_spill(spill, range(30, 60))              # spilled after it
+
+    stub = StubBackend()
+    try:
+        shipper = AlertShipper(url=stub.url, batch_url=stub.batch_url, spill_file=spill, flush_interval=0.05)
+        assert wait_for(lambda: len(stub.received) == 60)
+        shipper.close()
+    finally:
+        stub.close()
+    assert set(stub.received) == {f'A-{i}' for i in range(60)}
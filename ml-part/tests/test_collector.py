@@ -0,0 +1,50 @@
+from collector import PARSERS, Checkpoints
+from logTailer import LogTailer
+
+
+def parse_all(lines, **config):
+    parse = PARSERS['eventlog']({'name': 'win', **config})
+    return [event for event in map(parse, lines) if event is not None]
+
+
+def test_multiline_csv_record_is_reassembled():
+    lines = ['Level,Task Category,Event ID',
+             'Information,"An account failed to log on.',
+             '',
+             'Account Name: ""admin""',
+             'Failure Reason: Unknown user name or bad password.",4625',
+             'Information,Logon,4624']
+
+    events = parse_all(lines, column='Task Category')
+
+    assert [e['logData'] for e in events] == [
+        'An account failed to log on.\n\nAccount Name: "admin"\nFailure Reason: Unknown user name or bad password.',
+        'Logon']
+
+
+def test_unterminated_record_is_dropped_after_the_line_limit():
+    lines = ['Information,"never closed'] + ['more'] * 2000 + ['Information,after,1']
+
+    events = parse_all(lines, columnIndex=1)
+
+    assert [e['logData'] for e in events] == ['after']
+
+
+def test_offset_is_committed_only_after_every_earlier_event_is_done(tmp_path):
+    path = tmp_path / 'alert.fast'
+    path.write_text('a\nb\n')
+    tailer = LogTailer(str(path), start_at_end=False, use_notify=False)
+    checkpoints = Checkpoints(tailer)
+
+    tailer.read_available()
+    first = checkpoints.add(2)
+    with open(path, 'a') as f:
+        f.write('c\n')
+    tailer.read_available()
+    second = checkpoints.add(1)
+
+    checkpoints.done(second)
+    checkpoints.done(first)
+    assert tailer.stats()['offset'] == 0   # one event of the first batch is still queued
+    checkpoints.done(first)
+    assert tailer.stats()['offset'] == 6
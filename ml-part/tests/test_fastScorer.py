@@ -0,0 +1,69 @@
+import random
+
+import pytest
+from sklearn.feature_extraction.text import TfidfVectorizer as TFIDF
+from sklearn.linear_model import LogisticRegression as LR
+from sklearn.pipeline import make_pipeline as mp
+
+from fastScorer import FastScorer, SAMPLE_LOGS, check_parity, export_artifact
+from logMonitor import SAFE_LOGS, SUSPICIOUS_LOGS
+
+
+def training_set(n=400, seed=0):
+    rng = random.Random(seed)
+    X, y = [], []
+    for i in range(n):
+        suspicious = rng.random() < 0.4
+        template = rng.choice(SUSPICIOUS_LOGS if suspicious else SAFE_LOGS)
+        X.append(f"{template} host WS-{rng.randrange(50):03d} code 0x{rng.randrange(4096):x}")
+        y.append(int(suspicious))
+    return X, y
+
+
+def random_documents(vocabulary, n=2000, seed=1):
+    """Documents drawn from the fitted vocabulary plus out-of-vocabulary noise."""
+    rng = random.Random(seed)
+    words = list(vocabulary) + ['unseen', 'TOKEN', '42', 'x', 'the']
+    return [' '.join(rng.choice(words) for _ in range(rng.randrange(0, 25))) for _ in range(n)]
+
+
+@pytest.mark.parametrize('vectorizer_params', [
+    # the settings model.py trains with
+    {'max_features': 3000, 'stop_words': 'english', 'max_df': 0.8, 'min_df': 3},
+    {'ngram_range': (1, 2), 'sublinear_tf': True},
+    {'binary': True, 'norm': None},
+    {'ngram_range': (1, 3), 'stop_words': 'english'},
+])
+def test_exported_artifact_matches_pipeline_exactly(tmp_path, vectorizer_params):
+    X, y = training_set()
+    pipeline = mp(TFIDF(**vectorizer_params),
+                  LR(max_iter=1000, class_weight='balanced', solver='liblinear', random_state=42))
+    pipeline.fit(X, y)
+
+    export_artifact(pipeline, str(tmp_path / 'model.fast'))
+    scorer = FastScorer.load(str(tmp_path / 'model.fast'))
+
+    logs = SAMPLE_LOGS + random_documents(scorer.vocabulary)
+    assert check_parity(pipeline, scorer, logs) == 0
+
+
+def test_memory_mapped_artifact_matches(tmp_path):
+    X, y = training_set()
+    pipeline = mp(TFIDF(stop_words='english'), LR(solver='liblinear', random_state=42)).fit(X, y)
+    export_artifact(pipeline, str(tmp_path / 'model.fast'))
+
+    scorer = FastScorer.load(str(tmp_path / 'model.fast'), mmap=True)
+    assert check_parity(pipeline, scorer, SAMPLE_LOGS + X[:200]) == 0
+
+
+@pytest.mark.parametrize('ngram_range', [(1, 1), (1, 3), (2, 3)])
+def test_terms_match_the_sklearn_analyzer(tmp_path, ngram_range):
+    X, y = training_set()
+    vectorizer = TFIDF(ngram_range=ngram_range, stop_words='english')
+    pipeline = mp(vectorizer, LR(solver='liblinear', random_state=42)).fit(X, y)
+    export_artifact(pipeline, str(tmp_path / 'model.fast'))
+    scorer = FastScorer.load(str(tmp_path / 'model.fast'))
+
+    analyze = vectorizer.build_analyzer()
+    for doc in SAMPLE_LOGS + X[:50]:
+        assert scorer._terms(doc) == analyze(doc)
@@ -0,0 +1,99 @@
+import os
+
+from logTailer import LogTailer
+
+
+def append(path, start, stop):
+    with open(path, 'a', encoding='utf-8') as f:
+        for i in range(start, stop):
+            f.write(f'line {i}\n')
+
+
+def expected(start, stop):
+    return [f'line {i}' for i in range(start, stop)]
+
+
+def tailer(tmp_path, **kwargs):
+    return LogTailer(str(tmp_path / 'alert.fast'), state_file=str(tmp_path / 'state.json'),
+                     start_at_end=False, use_notify=False, checkpoint_interval=0, **kwargs)
+
+
+def read_all(t, max_bytes=None):
+    lines = []
+    while True:
+        batch = t.read_available(max_bytes=max_bytes)
+        if not batch:
+            return lines
+        lines.extend(batch)
+        t.commit()
+
+
+def test_backlog_is_read_in_bounded_batches(tmp_path):
+    append(tmp_path / 'alert.fast', 0, 50000)
+    t = tailer(tmp_path, chunk_size=64 * 1024)
+
+    batch = next(t.batches())
+
+    assert 0 < len(batch) < 50000
+    assert batch == expected(0, len(batch))
+
+
+def test_restart_resumes_after_the_last_committed_line(tmp_path):
+    append(tmp_path / 'alert.fast', 0, 1000)
+    t = tailer(tmp_path, chunk_size=4096)
+    first = t.read_available(max_bytes=4096)
+    t.commit()
+    t.read_available(max_bytes=4096)  # read but never committed
+    t.close()
+
+    append(tmp_path / 'alert.fast', 1000, 1200)
+    t = tailer(tmp_path, chunk_size=4096)
+    rest = read_all(t, max_bytes=4096)
+    t.close()
+
+    assert first + rest == expected(0, 1200)
+
+
+def test_rotation_drains_the_old_file_before_switching(tmp_path):
+    path = tmp_path / 'alert.fast'
+    append(path, 0, 100)
+    t = tailer(tmp_path, chunk_size=1024)
+    lines = read_all(t)
+
+    append(path, 100, 2000)               # written before the rotation, not read yet
+    os.rename(path, tmp_path / 'alert.fast.1')
+    append(path, 2000, 2100)              # the new file
+    lines += read_all(t, max_bytes=1024)
+    t.close()
+
+    assert lines == expected(0, 2100)
+    assert t.rotations == 1
+
+
+def test_truncation_starts_over_from_the_beginning(tmp_path):
+    path = tmp_path / 'alert.fast'
+    append(path, 0, 100)
+    t = tailer(tmp_path)
+    assert read_all(t) == expected(0, 100)
+
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('after truncate\n')
+    assert read_all(t) == ['after truncate']
+    assert t.truncations == 1
+    t.close()
+
+
+def test_position_from_before_a_truncation_is_not_committed(tmp_path):
+    path = tmp_path / 'alert.fast'
+    append(path, 0, 100)
+    t = tailer(tmp_path)
+    read_all_lines = t.read_available()
+    stale = t.position()
+
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('after truncate\n')
+    assert t.read_available() == ['after truncate']
+    t.commit(stale)
+    assert len(read_all_lines) == 100
+    assert t.stats()['offset'] == 0
+    t.close()
@@ -0,0 +1,41 @@
+import threading
+import time
+
+from microBatcher import MicroBatcher
+
+
+def test_single_caller_does_not_wait_for_the_batch_window():
+    batcher = MicroBatcher(lambda logs: [len(log) for log in logs], max_batch_size=64, max_wait_ms=500)
+    batcher.submit('warm-up')  # starts the worker thread
+
+    start = time.perf_counter()
+    for _ in range(5):
+        assert batcher.submit('abc') == 3
+    elapsed = time.perf_counter() - start
+
+    assert elapsed < 0.25, f"5 sequential round trips took {elapsed:.3f}s with a 500 ms window"
+    assert batcher.stats()['avgBatchSize'] == 1.0
+
+
+def test_concurrent_callers_are_batched_and_get_their_own_row():
+    def slow_score(logs):
+        time.sleep(0.01)
+        return [log.upper() for log in logs]
+
+    batcher = MicroBatcher(slow_score, max_batch_size=64, max_wait_ms=5)
+    results = {}
+
+    def caller(i):
+        for j in range(20):
+            results[(i, j)] = batcher.submit(f'line-{i}-{j}')
+
+    threads = [threading.Thread(target=caller, args=(i,)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert results == {(i, j): f'LINE-{i}-{j}' for i in range(8) for j in range(20)}
+    stats = batcher.stats()
+    assert stats['items'] == 160
+    assert stats['avgBatchSize'] > 1.0
@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+from sklearn.feature_extraction.text import TfidfVectorizer as TFIDF
+
+import model
+
+
+def test_pruned_vocabulary_matches_unbounded(tmp_path, monkeypatch):
+    rng = np.random.default_rng(0)
+    common = [f'word{i}' for i in range(300)]
+    # every row adds two one-off tokens, so the tracked terms keep growing
+    texts = [' '.join(list(rng.choice(common, 6)) + [f'rare{i}a', f'rare{i}b']) for i in range(3000)]
+    path = tmp_path / 'logs.csv'
+    pd.DataFrame({model.textCol: texts, model.labelCol: rng.integers(0, 2, len(texts))}).to_csv(path, index=False)
+    monkeypatch.setattr(model, 'dataset', str(path))
+
+    vocabulary, idf, _, n_docs = model.build_vocabulary(500)
+    pruned_vocabulary, pruned_idf, _, pruned_n_docs = model.build_vocabulary(500, max_terms=1000)
+
+    assert pruned_n_docs == n_docs
+    assert pruned_vocabulary == vocabulary
+    np.testing.assert_allclose(pruned_idf, idf)
+
+
+def test_vocabulary_matches_tfidf_fit_when_counts_tie(tmp_path, monkeypatch):
+    rng = np.random.default_rng(1)
+    # fixed templates, so many terms share exactly the same corpus count
+    templates = [' '.join(f'term{t}x{i}' for i in range(12)) for t in range(20)]
+    texts = [templates[i % len(templates)] for i in range(2000)]
+    path = tmp_path / 'logs.csv'
+    pd.DataFrame({model.textCol: texts, model.labelCol: rng.integers(0, 2, len(texts))}).to_csv(path, index=False)
+    monkeypatch.setattr(model, 'dataset', str(path))
+    monkeypatch.setattr(model, 'max_features', 50)
+
+    vocabulary, idf, _, _ = model.build_vocabulary(300)
+
+    train_texts = pd.concat([texts[~is_test] for texts, _, is_test in model.stream_chunks(300)])
+    vectorizer = TFIDF(stop_words='english', min_df=model.min_df, max_df=model.max_df, max_features=50)
+    vectorizer.fit(train_texts)
+    assert vocabulary == vectorizer.get_feature_names_out().tolist()
+    np.testing.assert_allclose(idf, vectorizer.idf_)
@@ -0,0 +1,71 @@
+import os
+
+import pytest
+
+import predictionCache
+from predictionCache import PredictionCache, normalize_log
+
+LINE = 'Failed  LOGIN from 10.0.0.1:5432 port 22 PID=77'
+
+
+@pytest.mark.parametrize('mask, expected', [
+    ((), 'failed login from 10.0.0.1:5432 port 22 pid=77'),
+    (('ips',), 'failed login from <ip>:5432 port 22 pid=77'),
+    (('ports',), 'failed login from 10.0.0.1:<port> port <port> pid=77'),
+    (('ips', 'ports'), 'failed login from <ip>:<port> port <port> pid=77'),
+    (('pids',), 'failed login from 10.0.0.1:5432 port 22 pid <pid>'),
+])
+def test_each_mask_only_touches_its_own_values(mask, expected):
+    assert normalize_log(LINE, mask) == expected
+
+
+def test_case_and_whitespace_share_an_entry_but_masked_values_only_when_asked():
+    cache = PredictionCache()
+    cache.put(LINE, 'Low')
+    assert cache.get('failed login from 10.0.0.1:5432   port 22 pid=77') == 'Low'
+    assert cache.get('failed login from 10.0.0.2:5432 port 22 pid=77') is None
+
+    masked = PredictionCache(mask=('ips',))
+    masked.put(LINE, 'Low')
+    assert masked.get('failed login from 10.9.9.9:5432 port 22 pid=77') == 'Low'
+
+    with pytest.raises(ValueError):
+        PredictionCache(mask=('hosts',))
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = PredictionCache(max_entries=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1   # b is now the least recently used
+    cache.put('c', 3)
+
+    assert cache.get('b') is None
+    assert cache.get('a') == 1 and cache.get('c') == 3
+    assert cache.stats()['evictions'] == 1
+
+
+def test_entries_expire_after_the_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(predictionCache.time, 'monotonic', lambda: now[0])
+    cache = PredictionCache(ttl_seconds=60)
+    cache.put('a', 1)
+
+    now[0] += 59
+    assert cache.get('a') == 1
+    now[0] += 2
+    assert cache.get('a') is None
+    assert cache.stats()['expirations'] == 1
+
+
+def test_cache_is_cleared_when_the_model_file_changes(tmp_path):
+    model_file = tmp_path / 'model.joblib'
+    model_file.write_bytes(b'v1')
+    cache = PredictionCache(model_path=str(model_file), check_interval=0)
+    cache.put('a', 1)
+    assert cache.get('a') == 1
+
+    model_file.write_bytes(b'v2 with a different size')
+    os.utime(model_file, ns=(0, 10 ** 18))
+    assert cache.get('a') is None
+    assert cache.stats()['invalidations'] == 1
@@ -0,0 +1,72 @@
+import random
+
+import pytest
+
+from snortRules import RuleEngine
+
+
+def brute_force_rank(ranges, sid):
+    return max((rank for low, high, rank in ranges if low <= sid <= high), default=-1)
+
+
+def test_overlapping_sid_ranges_take_the_highest_severity():
+    engine = RuleEngine([
+        {'name': 'low', 'severity': 'Low', 'sids': [[100, 200]]},
+        {'name': 'high', 'severity': 'High', 'sids': [[150, 160], 300]},
+        {'name': 'medium', 'severity': 'Medium', 'sids': [[120, 400]]},
+    ])
+
+    assert engine.classify('x', 99) == 'Safe'
+    assert engine.classify('x', 100) == 'Low'
+    assert engine.classify('x', 119) == 'Low'
+    assert engine.classify('x', 120) == 'Medium'
+    assert engine.classify('x', 150) == 'High'
+    assert engine.classify('x', 160) == 'High'
+    assert engine.classify('x', 161) == 'Medium'
+    assert engine.classify('x', 300) == 'High'
+    assert engine.classify('x', 400) == 'Medium'
+    assert engine.classify('x', 401) == 'Safe'
+
+
+def test_flattened_ranges_match_a_brute_force_lookup():
+    rng = random.Random(0)
+    for _ in range(200):
+        ranges = []
+        for _ in range(rng.randint(0, 30)):
+            low = rng.randint(0, 200)
+            ranges.append((low, low + rng.randint(0, 40), rng.randint(0, 3)))
+        engine = RuleEngine([])
+        engine._sid_starts, engine._sid_ranks = RuleEngine._flatten_ranges(ranges)
+        for sid in range(-1, 260):
+            assert engine._sid_rank(sid) == brute_force_rank(ranges, sid)
+
+
+def test_keyword_severity_beats_a_lower_sid_match():
+    engine = RuleEngine([
+        {'name': 'sids', 'severity': 'Low', 'sids': [[1000, 1001]]},
+        {'name': 'scan', 'severity': 'High', 'keywords': ['NMAP']},
+    ])
+
+    assert engine.classify('ET SCAN nmap -sS', 1000) == 'High'
+    # results are cached per sid, so the second message needs its own
+    assert engine.classify('ICMP ping', 1001) == 'Low'
+
+
+def test_keyword_that_is_a_prefix_of_another_still_matches():
+    engine = RuleEngine([
+        {'name': 'short', 'severity': 'Medium', 'keywords': ['SCAN']},
+        {'name': 'long', 'severity': 'Medium', 'keywords': ['SCANNER', 'SCANNING TOOL']},
+        {'name': 'high', 'severity': 'High', 'keywords': ['EXPLOIT', 'EXPLOIT KIT']},
+    ])
+
+    assert engine.classify('port scan detected') == 'Medium'
+    assert engine.classify('web scanner user-agent') == 'Medium'
+    assert engine.classify('exploit kit landing page') == 'High'
+    assert engine.classify('exploitation attempt') == 'High'
+    assert engine.classify('ICMP ping') == 'Safe'
+
+
+@pytest.mark.parametrize('sid', ['2100498', [5], [9, 3], True, [1, '2']])
+def test_invalid_sids_name_the_rule(sid):
+    with pytest.raises(ValueError, match="'bad rule'"):
+        RuleEngine([{'name': 'bad rule', 'severity': 'Low', 'sids': [sid]}])
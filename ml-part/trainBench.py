@@ -0,0 +1,279 @@
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import joblib as jl
+import numpy as np
+import sklearn
+from sklearn.feature_extraction.text import TfidfVectorizer as TFIDF
+from sklearn.linear_model import LogisticRegression as LR
+from sklearn.linear_model import SGDClassifier
+from sklearn.metrics import accuracy_score, f1_score
+from sklearn.model_selection import StratifiedKFold
+from sklearn.pipeline import make_pipeline as mp
+
+import model
+from fastScorer import FastScorer, export_artifact
+
+# ------------------------------------------------------------
+# Hyperparameter Search + Training Benchmark
+# ------------------------------------------------------------
+# Cross-validates every (vectorizer, classifier) combination below on the
+# labeled CSV and records, per candidate:
+#   fit time, inference latency per 1k raw log lines (TF-IDF + predict),
+#   pickled model size, accuracy and F1 (suspicious class)
+# then prints the candidates on the latency / F1 frontier.
+#
+# TF-IDF is the expensive part, so each (vectorizer, fold) pair is fitted
+# once, dumped to the cache directory and shared by all classifiers;
+# both the vectorizing and the candidate runs are spread over a process
+# pool. Latency is measured afterwards, one candidate at a time in this
+# process, so the timings are not skewed by the busy pool. It is taken on
+# the exported FastScorer that app.py serves (latencyMsPer1k, used for the
+# frontier) and on the sklearn pipeline (pipelineLatencyMsPer1k).
+
+VECTORIZER_GRID = {
+    'max_features': [1000, 3000, 10000],
+    'ngram_range': [(1, 1), (1, 2)],
+    'sublinear_tf': [False, True]
+}
+
+CLASSIFIER_GRID = [
+    ('logreg-liblinear', {'C': [0.1, 1.0, 10.0]}),
+    ('sgd-log', {'alpha': [1e-5, 1e-4, 1e-3]})
+]
+
+LATENCY_LINES = 1000
+LATENCY_REPEATS = 3  # best of, after a warm-up call
+
+
+def expand(grid):
+    keys = sorted(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+
+
+def make_vectorizer(params):
+    return TFIDF(stop_words='english', min_df=model.min_df, max_df=model.max_df, **params)
+
+
+def make_classifier(kind, params):
+    if kind == 'logreg-liblinear':
+        return LR(max_iter=1000, class_weight='balanced', solver='liblinear', random_state=42, **params)
+    if kind == 'sgd-log':
+        return SGDClassifier(loss='log_loss', class_weight='balanced', random_state=42, **params)
+    raise ValueError(f"Unknown classifier kind: {kind}")
+
+
+def cache_key(params, fold, n_folds, dataset_signature):
+    raw = json.dumps([params, fold, n_folds, dataset_signature, sklearn.__version__], sort_keys=True, default=str)
+    return hashlib.sha1(raw.encode()).hexdigest()[:16]
+
+
+# ------------------------------------------------------------
+# Worker functions (run in the process pool)
+# ------------------------------------------------------------
+def vectorize_fold(task):
+    """Fit one vectorizer on one training fold and cache the matrices."""
+    params, X_train, X_test, path = task
+    if os.path.exists(path):
+        return path
+    vectorizer = make_vectorizer(params)
+    start = time.perf_counter()
+    Xt_train = vectorizer.fit_transform(X_train)
+    fit_seconds = time.perf_counter() - start
+    Xt_test = vectorizer.transform(X_test)
+    tmp = path + '.tmp'
+    jl.dump({'vectorizer': vectorizer, 'train': Xt_train, 'test': Xt_test, 'fitSeconds': fit_seconds}, tmp)
+    os.replace(tmp, path)
+    return path
+
+
+def evaluate_candidate(task):
+    """Cross-validate one (vectorizer, classifier) candidate from cached folds."""
+    vec_params, kind, clf_params, fold_paths, fold_labels, model_path = task
+    fit_times, accuracies, f1s = [], [], []
+    pipeline = None
+
+    for path, (y_train, y_test) in zip(fold_paths, fold_labels):
+        cached = jl.load(path)
+        classifier = make_classifier(kind, clf_params)
+        start = time.perf_counter()
+        classifier.fit(cached['train'], y_train)
+        fit_times.append(cached['fitSeconds'] + time.perf_counter() - start)
+        y_pred = classifier.predict(cached['test'])
+        accuracies.append(accuracy_score(y_test, y_pred))
+        f1s.append(f1_score(y_test, y_pred, zero_division=0))
+        if pipeline is None:
+            pipeline = mp(cached['vectorizer'], classifier)
+
+    # size (and later latency) are measured on the first fold's full pipeline
+    jl.dump(pipeline, model_path)
+    size_bytes = os.path.getsize(model_path)
+
+    return {
+        'vectorizer': vec_params,
+        'classifier': kind,
+        'classifierParams': clf_params,
+        'fitSeconds': round(float(np.mean(fit_times)), 4),
+        'modelBytes': size_bytes,
+        'accuracy': round(float(np.mean(accuracies)), 4),
+        'f1': round(float(np.mean(f1s)), 4),
+        'f1Std': round(float(np.std(f1s)), 4)
+    }
+
+
+# ------------------------------------------------------------
+# Latency (run in this process once the pool is done)
+# ------------------------------------------------------------
+def time_per_1k(predict_proba, logs):
+    predict_proba(logs[:10])  # warm-up
+    best = float('inf')
+    for _ in range(LATENCY_REPEATS):
+        start = time.perf_counter()
+        predict_proba(logs)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000 * LATENCY_LINES / len(logs)
+
+
+def measure_latency(model_path, logs):
+    """ms per 1k lines for the saved pipeline and for its exported FastScorer."""
+    pipeline = jl.load(model_path)
+    with tempfile.TemporaryDirectory() as artifact_dir:
+        export_artifact(pipeline, artifact_dir)
+        scorer = FastScorer.load(artifact_dir)
+        return {
+            'latencyMsPer1k': round(time_per_1k(scorer.predict_proba, logs), 3),
+            'pipelineLatencyMsPer1k': round(time_per_1k(pipeline.predict_proba, logs), 3)
+        }
+
+
+# ------------------------------------------------------------
+# Search driver
+# ------------------------------------------------------------
+def pareto_frontier(results):
+    """Candidates no other candidate beats on both latency and F1."""
+    frontier = []
+    for r in results:
+        dominated = any(
+            o['latencyMsPer1k'] <= r['latencyMsPer1k'] and o['f1'] >= r['f1']
+            and (o['latencyMsPer1k'] < r['latencyMsPer1k'] or o['f1'] > r['f1'])
+            for o in results
+        )
+        if not dominated:
+            frontier.append(r)
+    return sorted(frontier, key=lambda r: r['latencyMsPer1k'])
+
+
+def run_search(n_folds, workers, cache_dir, sample):
+    X, y = model.load_dataset()
+    if sample and len(X) > sample:
+        X = X.sample(sample, random_state=42)
+        y = y.loc[X.index]
+    X = X.reset_index(drop=True)
+    y = y.reset_index(drop=True).to_numpy()
+
+    st = os.stat(model.dataset)
+    dataset_signature = [os.path.abspath(model.dataset), st.st_size, st.st_mtime_ns, sample]
+    os.makedirs(cache_dir, exist_ok=True)
+
+    folds = list(StratifiedKFold(n_splits=n_folds, shuffle=True, random_state=42).split(X, y))
+    fold_labels = [(y[train], y[test]) for train, test in folds]
+    vectorizer_configs = expand(VECTORIZER_GRID)
+    candidates = [
+        (vec, kind, clf)
+        for vec in vectorizer_configs
+        for kind, grid in CLASSIFIER_GRID
+        for clf in expand(grid)
+    ]
+    print(f"\n{len(candidates)} candidates x {n_folds} folds on {len(X)} samples, {workers} worker processes")
+
+    timings = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # --- vectorize every (vectorizer, fold) pair once ---
+        start = time.perf_counter()
+        fold_paths = {}
+        tasks = []
+        for vec in vectorizer_configs:
+            key = json.dumps(vec, sort_keys=True)
+            fold_paths[key] = []
+            for i, (train, test) in enumerate(folds):
+                # every vectorizer setting, not just the grid's: model.min_df,
+                # max_df and the stop words change the cached matrices too
+                params = make_vectorizer(vec).get_params()
+                path = os.path.join(cache_dir, cache_key(params, i, n_folds, dataset_signature) + '.joblib')
+                fold_paths[key].append(path)
+                if not os.path.exists(path):
+                    tasks.append((vec, X.iloc[train], X.iloc[test], path))
+        list(pool.map(vectorize_fold, tasks))
+        timings['vectorizeSeconds'] = round(time.perf_counter() - start, 2)
+        print(f"Vectorized {len(tasks)} folds ({len(vectorizer_configs) * n_folds - len(tasks)} cached) "
+              f"in {timings['vectorizeSeconds']} s")
+
+        # --- cross-validate every candidate ---
+        start = time.perf_counter()
+        model_paths = [
+            os.path.join(cache_dir, f"candidate-{cache_key([vec, kind, clf], 0, n_folds, dataset_signature)}.joblib")
+            for vec, kind, clf in candidates
+        ]
+        tasks = [
+            (vec, kind, clf, fold_paths[json.dumps(vec, sort_keys=True)], fold_labels, model_path)
+            for (vec, kind, clf), model_path in zip(candidates, model_paths)
+        ]
+        results = list(pool.map(evaluate_candidate, tasks))
+        timings['searchSeconds'] = round(time.perf_counter() - start, 2)
+
+    # --- latency, one candidate at a time with the pool shut down ---
+    start = time.perf_counter()
+    rng = np.random.default_rng(42)
+    latency_logs = X.iloc[rng.integers(0, len(X), LATENCY_LINES)].tolist()
+    for result, model_path in zip(results, model_paths):
+        try:
+            result.update(measure_latency(model_path, latency_logs))
+        finally:
+            os.remove(model_path)
+    timings['latencySeconds'] = round(time.perf_counter() - start, 2)
+
+    return results, timings, len(X)
+
+
+def print_results(results, frontier):
+    header = f"{'classifier':<18}{'params':<20}{'vectorizer':<72}{'fit s':>8}{'ms/1k':>9}{'skl ms':>9}{'KB':>8}{'acc':>7}{'f1':>7}"
+    print("\n-- All Candidates (best F1 first) --")
+    print(header)
+    for r in sorted(results, key=lambda r: (-r['f1'], r['latencyMsPer1k'])):
+        marker = ' *' if r in frontier else ''
+        print(f"{r['classifier']:<18}{json.dumps(r['classifierParams']):<20}{json.dumps(r['vectorizer']):<72}"
+              f"{r['fitSeconds']:>8.2f}{r['latencyMsPer1k']:>9.2f}{r['pipelineLatencyMsPer1k']:>9.2f}{r['modelBytes'] / 1024:>8.0f}"
+              f"{r['accuracy']:>7.3f}{r['f1']:>7.3f}{marker}")
+    print("\nms/1k = exported FastScorer, skl ms = sklearn pipeline; * = on the latency / F1 frontier")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Cross-validated model search with latency/size benchmarks.")
+    parser.add_argument('--folds', type=int, default=5)
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="process pool size (default: all cores)")
+    parser.add_argument('--cache-dir', default='.bench_cache', help="where vectorized folds are cached")
+    parser.add_argument('--sample', type=int, default=0, help="subsample the dataset to N rows (0 = all)")
+    parser.add_argument('--output', default='trainBench_results.json')
+    args = parser.parse_args()
+
+    results, timings, n_samples = run_search(args.folds, args.workers, args.cache_dir, args.sample)
+    frontier = pareto_frontier(results)
+    print_results(results, frontier)
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump({
+            'dataset': model.dataset,
+            'samples': n_samples,
+            'folds': args.folds,
+            'workers': args.workers,
+            'timings': timings,
+            'results': results,
+            'frontier': frontier
+        }, f, indent=2)
+    print(f"\n✅ Results written to '{args.output}'")
@@ -0,0 +1,234 @@
+import bisect
+import heapq
+import json
+import re
+import sys
+import time
+
+# ------------------------------------------------------------
+# Snort Alert Rule Engine
+# ------------------------------------------------------------
+# Maps a Snort alert (gid, sid, message) to a severity using rules from a
+# JSON config file (see snort_rules.json):
+#
+#   {
+#     "severities": ["Safe", "Low", "Medium", "High"],   lowest -> highest
+#     "default": "Safe",
+#     "rules": [
+#       {"name": "...", "severity": "High", "keywords": ["NMAP", ...]},
+#       {"name": "...", "severity": "Medium", "regex": ["ET SCAN .*"]},
+#       {"name": "...", "severity": "Low", "sids": [[1000000, 1999999], 2100498]}
+#     ]
+#   }
+#
+# An alert gets the highest severity of any rule it matches. Keywords are
+# case-insensitive substrings, regexes are searched case-insensitively and
+# sids are single ids or inclusive [low, high] ranges.
+#
+# All keywords and regexes of one severity are compiled into a single
+# regex, so a message costs one search per severity level no matter how
+# many rules there are. Keywords are merged into a prefix trie first:
+# Python's re tries alternatives one by one, and a flat alternation of
+# thousands of literals would be slower than the loop it replaces.
+# SID ranges are flattened into sorted segments looked up with bisect.
+# Snort messages are fixed per signature, so the result is cached per
+# (gid, sid).
+
+DEFAULT_SEVERITIES = ['Safe', 'Low', 'Medium', 'High']
+MAX_CACHED_SIDS = 100000
+
+# one alert.fast line:
+# 10/18-20:30:19.123456  [**] [gid:sid:rev] msg [**] [Classification: ...] [Priority: n] {PROTO} src:port -> dst:port
+SNORT_PATTERN = re.compile(
+    r'\[\*\*\]\s+\[(\d+):(\d+):\d+\]\s+(.*?)\s+\[\*\*\].*\{(\w+)\}\s+([\d\.]+:\d+)\s+->\s+([\d\.]+:\d+)'
+)
+
+
+def keyword_trie_pattern(keywords):
+    """Regex matching any of keywords (as substrings), built from a prefix trie."""
+    trie = {}
+    for keyword in keywords:
+        node = trie
+        for ch in keyword.lower():
+            node = node.setdefault(ch, {})
+        # a keyword ending here already makes the search succeed, so
+        # longer keywords sharing this prefix are redundant
+        node.clear()
+        node[''] = True
+
+    def build(node):
+        if '' in node:
+            return ''
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items())]
+        return branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+
+    return build(trie) if trie else None
+
+
+class RuleEngine:
+    def __init__(self, rules, severities=None, default='Safe'):
+        self.severities = list(severities or DEFAULT_SEVERITIES)
+        self.rank = {name: i for i, name in enumerate(self.severities)}
+        if default not in self.rank:
+            raise ValueError(f"Default severity {default!r} is not in {self.severities}")
+        self.default = default
+
+        keywords = {name: [] for name in self.severities}
+        patterns = {name: [] for name in self.severities}
+        ranges = []
+        for rule in rules:
+            severity = rule.get('severity')
+            if severity not in self.rank:
+                raise ValueError(f"Rule {rule.get('name')!r} has unknown severity {severity!r}")
+            keywords[severity].extend(rule.get('keywords', []))
+            for regex in rule.get('regex', []):
+                re.compile(regex)  # fail early with the offending pattern
+                patterns[severity].append(f'(?:{regex})')
+            for sid in rule.get('sids', []):
+                low, high = self._sid_range(rule, sid)
+                ranges.append((low, high, self.rank[severity]))
+
+        for name in self.severities:
+            trie = keyword_trie_pattern(keywords[name])
+            if trie:
+                patterns[name].insert(0, trie)
+
+        # highest severity first, so the first matching level wins
+        self._levels = [
+            (name, re.compile('|'.join(patterns[name]), re.IGNORECASE))
+            for name in reversed(self.severities) if patterns[name]
+        ]
+        self._sid_starts, self._sid_ranks = self._flatten_ranges(ranges)
+        self._cache = {}
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path, encoding='utf-8') as f:
+            config = json.load(f)
+        return cls(
+            config.get('rules', []),
+            severities=config.get('severities'),
+            default=config.get('default', 'Safe')
+        )
+
+    @staticmethod
+    def _sid_range(rule, sid):
+        def is_int(value):
+            return isinstance(value, int) and not isinstance(value, bool)
+
+        if is_int(sid):
+            return sid, sid
+        if isinstance(sid, (list, tuple)) and len(sid) == 2 and all(map(is_int, sid)) and sid[0] <= sid[1]:
+            return sid[0], sid[1]
+        raise ValueError(f"Rule {rule.get('name')!r} has invalid sid {sid!r}; "
+                         f"expected an integer or an inclusive [low, high] pair")
+
+    @staticmethod
+    def _flatten_ranges(ranges):
+        # sweep the sorted range boundaries into disjoint segments, each
+        # carrying the highest rank of the ranges covering it (-1 = uncovered);
+        # ranges that have ended are popped lazily from the max-heap
+        events = sorted((low, high + 1, rank) for low, high, rank in ranges)
+        points = sorted({low for low, _, _ in events} | {end for _, end, _ in events})
+        active = []  # (-rank, end)
+        starts, ranks = [], []
+        i = 0
+        for start in points:
+            while i < len(events) and events[i][0] == start:
+                _, end, rank = events[i]
+                heapq.heappush(active, (-rank, end))
+                i += 1
+            while active and active[0][1] <= start:
+                heapq.heappop(active)
+            rank = -active[0][0] if active else -1
+            if not ranks or ranks[-1] != rank:
+                starts.append(start)
+                ranks.append(rank)
+        return starts, ranks
+
+    def _sid_rank(self, sid):
+        i = bisect.bisect_right(self._sid_starts, sid) - 1
+        return self._sid_ranks[i] if i >= 0 else -1
+
+    def _evaluate(self, msg, sid):
+        rank = self._sid_rank(sid) if sid is not None else -1
+        for name, pattern in self._levels:
+            if self.rank[name] <= rank:
+                break
+            if pattern.search(msg):
+                rank = self.rank[name]
+                break
+        return self.severities[rank] if rank >= 0 else self.default
+
+    def classify(self, msg, sid=None, gid=1):
+        """Severity for one alert; cached per (gid, sid) when sid is known."""
+        if sid is None:
+            return self._evaluate(msg, None)
+        key = (gid, sid)
+        severity = self._cache.get(key)
+        if severity is not None:
+            self.cache_hits += 1
+            return severity
+        self.cache_misses += 1
+        severity = self._evaluate(msg, sid)
+        if len(self._cache) >= MAX_CACHED_SIDS:
+            self._cache.clear()
+        self._cache[key] = severity
+        return severity
+
+    def stats(self):
+        return {
+            'levels': len(self._levels),
+            'sidSegments': len(self._sid_starts),
+            'cachedSids': len(self._cache),
+            'cacheHits': self.cache_hits,
+            'cacheMisses': self.cache_misses
+        }
+
+
+# ------------------------------------------------------------
+# Micro-benchmark: rule engine vs. the original keyword loop
+# ------------------------------------------------------------
+def legacy_classify(msg, keywords):
+    msg = msg.upper()
+    for k in keywords:
+        if k in msg:
+            return "High"
+    return "Safe"
+
+
+def run_benchmark(n_keywords=5000, n_messages=20000, n_sids=500):
+    import random
+    rng = random.Random(42)
+    words = ['TROJAN', 'POLICY', 'MALWARE', 'EXPLOIT', 'ICMP', 'DNS', 'HTTP', 'SQL', 'SMB', 'RPC']
+    keywords = [f"{rng.choice(words)}-{i:05d}" for i in range(n_keywords)]
+    messages = [
+        f"ET {rng.choice(words)} {rng.choice(words)} activity {rng.randint(0, 999)}" for _ in range(n_sids)
+    ]
+    sids = [rng.randrange(n_sids) for _ in range(n_messages)]
+    alerts = [(messages[sid], 1000000 + sid) for sid in sids]
+
+    engine = RuleEngine([{'name': 'bench', 'severity': 'High', 'keywords': keywords}])
+
+    def timed(fn):
+        start = time.perf_counter()
+        for msg, sid in alerts:
+            fn(msg, sid)
+        return (time.perf_counter() - start) / len(alerts) * 1e6
+
+    results = {
+        'legacy keyword loop': timed(lambda msg, sid: legacy_classify(msg, keywords)),
+        'rule engine (no sid cache)': timed(lambda msg, sid: engine.classify(msg)),
+        'rule engine (sid cache)': timed(lambda msg, sid: engine.classify(msg, sid))
+    }
+    print(f"{n_keywords} keywords, {n_messages} alerts over {n_sids} distinct sids")
+    for name, micros in results.items():
+        print(f"  {name:<28} {micros:10.2f} µs/alert")
+    return results
+
+
+if __name__ == '__main__':
+    # python snortRules.py [n_keywords]
+    run_benchmark(n_keywords=int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
@@ -1,69 +1,118 @@
 import time as t
-import requests as req
-import re
 import os
-import uuid
+import random
+import sys
 
-SNORT_ALERT_FILE = r"C:\Snort\log\alert.fast"
+# shared Python pipeline modules live in ml-part/
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'ml-part'))
+from alertShipper import AlertShipper
+from logTailer import LogTailer
+from snortRules import RuleEngine, SNORT_PATTERN
+from alertAggregator import AlertAggregator
+from instrumentation import stage_histogram, counter, gauge, get_logger, start_metrics_server
+
+log = get_logger('snort')
+
+# single sensor; for several sensors (or syslog / event-log sources) in one
+# process use ml-part/collector.py
+SNORT_ALERT_FILE = os.environ.get("SNORT_ALERT_FILE", r"C:\Snort\log\alert.fast")
+SNORT_RULES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "snort_rules.json")
+# read offset is persisted here so a restart neither skips nor resends alerts
+SNORT_STATE_FILE = "snort_tailer_state.json"
+STATUS_INTERVAL_SECONDS = 10
 BACKEND_API = "http://127.0.0.1:3001/api/log-alert"
+BACKEND_BATCH_API = "http://127.0.0.1:3001/api/log-alert/batch"
 API_KEY = "snort-secret-key"
+# the first of identical (msg, src host, dst host, proto) alerts is sent at
+# once; repeats inside this window follow as one aggregated alert
+DEDUP_WINDOW_SECONDS = 10
+DEDUP_MAX_KEYS = 10000
+# Prometheus /metrics for this collector (0 = disabled)
+METRICS_PORT = int(os.environ.get("SNORT_METRICS_PORT", 9101))
 
-SNORT_PATTERN = re.compile(
-    r'\[\*\*\]\s+\[\d+:\d+:\d+\]\s+(.*?)\s+\[\*\*\].*\{(\w+)\}\s+([\d\.]+:\d+)\s+->\s+([\d\.]+:\d+)'
-)
+rules = RuleEngine.from_file(SNORT_RULES_FILE)
 
-def classify(msg):
-    msg = msg.upper()
-    for k in ["SCAN", "PORTSCAN", "NMAP", "PROBE", "RECON"]:
-        if k in msg:
-            return "High"
-    return "Safe"
+def classify(msg, sid=None, gid=1):
+    return rules.classify(msg, sid, gid)
+
+shipper = AlertShipper(
+    url=BACKEND_API,
+    batch_url=BACKEND_BATCH_API,
+    headers={"x-api-key": API_KEY},
+    timeout=3,
+    spill_file="snort_spill.jsonl"
+)
 
 def send(payload):
-    try:
-        r = req.post(
-            BACKEND_API,
-            json=payload,
-            headers={"x-api-key": API_KEY},
-            timeout=3
-        )
-        print("➡ Sent to backend:", r.status_code)
-    except Exception as e:
-        print("❌ Backend error:", e)
+    # queued; the shipper batches, retries and spills in the background
+    shipper.submit(payload)
 
-def monitor_snort():
-    print("🟢 Monitoring Snort alerts...")
+aggregator = AlertAggregator(send, window_seconds=DEDUP_WINDOW_SECONDS, max_keys=DEDUP_MAX_KEYS)
+
+lines_total = counter("snort_lines_total", "alert.fast lines read", result="matched")
+unmatched_total = counter("snort_lines_total", "alert.fast lines read", result="unmatched")
+# handle_line runs per alert line, so it times itself with plain perf_counter() calls
+parse_seconds = stage_histogram("parse")
+classify_seconds = stage_histogram("classify")
 
-    while not os.path.exists(SNORT_ALERT_FILE):
-        t.sleep(1)
+def handle_line(line):
+    start = t.perf_counter()
+    m = SNORT_PATTERN.search(line)
+    parse_seconds.observe(t.perf_counter() - start)
+    if not m:
+        unmatched_total.inc()
+        return False
+    lines_total.inc()
 
-    with open(SNORT_ALERT_FILE, "r", errors="ignore") as f:
-        f.seek(0, os.SEEK_END)
+    gid, sid, msg, proto, src, dst = m.groups()
+    start = t.perf_counter()
+    sev = classify(msg, int(sid), int(gid))
+    classify_seconds.observe(t.perf_counter() - start)
 
-        while True:
-            line = f.readline()
-            if not line:
-                t.sleep(0.1)
-                continue
+    payload = {
+        # 48 random bits: the backend drops repeats of a recent alertId, and
+        # random is much cheaper per line than uuid4's os.urandom
+        "alertId": f"SNORT-{random.getrandbits(48):012x}",
+        "sourceType": "Snort IDS",
+        "severity": sev,
+        "logData": f"{msg} | {src} -> {dst}",
+        # aggregation key, stripped before the alert is shipped
+        "msg": msg,
+        "src": src,
+        "dst": dst,
+        "proto": proto
+    }
 
-            print("RAW:", line.strip())
+    # per line, so DEBUG only; the status line below is the INFO output
+    log.debug("DETECTED [%s] %s", sev, msg)
+    aggregator.add(payload)
+    return True
 
-            m = SNORT_PATTERN.search(line)
-            if not m:
-                print("❌ NO MATCH")
-                continue
+def monitor_snort():
+    print("🟢 Monitoring Snort alerts...")
 
-            msg, proto, src, dst = m.groups()
-            sev = classify(msg)
+    tailer = LogTailer(SNORT_ALERT_FILE, state_file=SNORT_STATE_FILE)
+    if METRICS_PORT:
+        gauge("snort_tailer_lag_bytes", "Unread bytes in alert.fast", lambda: tailer.stats()["lagBytes"])
+        gauge("snort_dedup_open_windows", "Open aggregation windows", lambda: aggregator.stats()["openWindows"])
+        gauge("snort_shipper_queue_depth", "Alerts waiting to be shipped", lambda: shipper.stats()["queueDepth"])
+        start_metrics_server(METRICS_PORT)
+        print(f"📊 Metrics on http://127.0.0.1:{METRICS_PORT}/metrics")
+    unmatched = 0
+    next_status = t.monotonic() + STATUS_INTERVAL_SECONDS
 
-            payload = {
-                "alertId": "SNORT-" + uuid.uuid4().hex[:6],
-                "sourceType": "Snort IDS",
-                "severity": sev,
-                "logData": f"{msg} | {src} -> {dst}"
-            }
+    for lines in tailer.batches():
+        for line in lines:
+            if not handle_line(line):
+                unmatched += 1
 
-            print(f"🔥 DETECTED [{sev}] {msg}")
-            send(payload)
+        if t.monotonic() >= next_status:
+            next_status = t.monotonic() + STATUS_INTERVAL_SECONDS
+            stats = tailer.stats()
+            dedup = aggregator.stats()
+            log.info("%s lines/s, lag %s bytes, %d unmatched lines, %s rotations, %.1f%% duplicates suppressed",
+                     stats['linesPerSecond'], stats['lagBytes'], unmatched, stats['rotations'],
+                     dedup['suppressionRatio'] * 100)
 
-monitor_snort()
+if __name__ == "__main__":
+    monitor_snort()